@@ -9,18 +9,25 @@ import time
 import threading
 from abc import ABC, abstractmethod
 from collections import deque
+from functools import lru_cache
 from pathlib import Path
 from urllib.parse import urljoin, urlparse, unquote
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from rich.live import Live
 
 try:
     from progress_tracker import ProgressTracker
     from database_manager import DatabaseManager
+    from output_format import OutputFormat
 except ImportError:
     from src.progress_tracker import ProgressTracker
     from src.database_manager import DatabaseManager
+    from src.output_format import OutputFormat
+
+# Memoized urlparse: the same links (navigation, breadcrumbs) appear on nearly every page
+# and are re-parsed for filtering and normalization; ParseResult is immutable, so sharing is safe
+parse_url = lru_cache(maxsize=8192)(urlparse)
 
 
 class BaseCrawler(ABC):
@@ -62,7 +69,7 @@ class BaseCrawler(ABC):
         self.request_delay = self.config.get('crawling', {}).get('request_delay', 0.5)
         
         # Output configuration
-        self.output_format = self.config.get('output', {}).get('format', 'markdown').lower()
+        self.output_format = OutputFormat.parse(self.config.get('output', {}).get('format', 'markdown'))
         self.output_dir = self.config.get('output', {}).get('output_dir', 'downloaded_content')
         
         # Internal state
@@ -137,7 +144,7 @@ class BaseCrawler(ABC):
                 return False
         
         # Check domain
-        parsed_url = urlparse(url)
+        parsed_url = parse_url(url)
         if self.base_domain and self.base_domain not in parsed_url.netloc:
             return False
         
@@ -168,7 +175,7 @@ class BaseCrawler(ABC):
         Returns:
             Normalized URL
         """
-        parsed = urlparse(url)
+        parsed = parse_url(url)
         # Remove fragment
         normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
         if parsed.query:
@@ -186,7 +193,7 @@ class BaseCrawler(ABC):
         Returns:
             Path object for the local file
         """
-        parsed_url = urlparse(url)
+        parsed_url = parse_url(url)
         path_parts = [p for p in parsed_url.path.split('/') if p]
         
         # Create base directory structure
@@ -210,7 +217,7 @@ class BaseCrawler(ABC):
         page_dir.mkdir(parents=True, exist_ok=True)
         
         # Determine file extension
-        extension = '.md' if self.output_format == 'markdown' else '.html'
+        extension = self.output_format.extension
         
         return page_dir / f"index{extension}"
     
@@ -318,11 +325,11 @@ class BaseCrawler(ABC):
                         self.progress_tracker.update_stat('active_threads', value=len(futures))
                         live.update(self.progress_tracker.create_progress_panel())
                 
-                    # Check for completed futures
-                    completed = []
-                    for future in list(futures.keys()):
-                        if future.done():
-                            completed.append(future)
+                    # Block until at least one download finishes, then refill the window
+                    # right away instead of polling
+                    completed = ()
+                    if futures:
+                        completed, _ = wait(futures, return_when=FIRST_COMPLETED)
                 
                     # Process completed futures
                     for future in completed:
@@ -385,9 +392,6 @@ class BaseCrawler(ABC):
                     # Exit condition: no more futures and queue is empty
                     if not futures and not self.download_queue:
                         break
-                
-                    # Small delay to avoid busy waiting
-                    time.sleep(0.1)
         
         self.end_time = datetime.now()
         self._print_final_summary()
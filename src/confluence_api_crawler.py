@@ -7,6 +7,7 @@ import os
 import re
 import time
 import json
+import shutil
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urljoin, urlparse, unquote
@@ -26,12 +27,14 @@ try:
     from confluence_metadata import ConfluenceMetadata
     from database_manager import DatabaseManager
     from progress_tracker import ProgressTracker
+    from tls_adapter import PreloadedTLSAdapter
 except ImportError:
     from src.base_crawler import BaseCrawler
     from src.confluence_auth import ConfluenceAuth
     from src.confluence_metadata import ConfluenceMetadata
     from src.database_manager import DatabaseManager
     from src.progress_tracker import ProgressTracker
+    from src.tls_adapter import PreloadedTLSAdapter
 
 
 class ConfluenceAPICrawler(BaseCrawler):
@@ -59,6 +62,7 @@ class ConfluenceAPICrawler(BaseCrawler):
             raise ValueError("❌ Confluence authentication is not properly configured")
         
         self.api_base = self.auth.get_api_base_url()
+        self.api_session = self._create_api_session()
         self.metadata_handler = ConfluenceMetadata(self.db)
         
         # Confluence-specific settings
@@ -73,6 +77,28 @@ class ConfluenceAPICrawler(BaseCrawler):
         print(f"   Save YAML: {self.save_yaml}")
         print(f"   Download Attachments: {self.download_attachments}")
     
+    def _create_api_session(self) -> requests.Session:
+        """
+        Create the pooled HTTP session shared by all API calls
+        
+        Auth and headers are set once, and keep-alive connections are reused across
+        workers instead of opening a new TCP/TLS connection per request.
+        """
+        session = requests.Session()
+        session.auth = self.auth.get_auth_tuple()
+        session.headers.update(self.auth.get_headers())
+        
+        # Workers fetch pages and attachments concurrently, keep a connection for each
+        pool_size = self.max_workers * 2
+        adapter = PreloadedTLSAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+    
+    def close(self):
+        """Close the API session's pooled connections"""
+        self.api_session.close()
+    
     def fetch_page(self, url: str, depth: int) -> dict:
         """
         Fetch a Confluence page using the REST API
@@ -107,11 +133,9 @@ class ConfluenceAPICrawler(BaseCrawler):
             
             start_time = time.time()
             
-            response = requests.get(
+            response = self.api_session.get(
                 api_url,
-                auth=self.auth.get_auth_tuple(),
                 params=params,
-                headers=self.auth.get_headers(),
                 timeout=(5, 15)
             )
             
@@ -213,11 +237,9 @@ class ConfluenceAPICrawler(BaseCrawler):
                     'expand': '_links.webui'
                 }
                 
-                response = requests.get(
+                response = self.api_session.get(
                     search_url,
-                    auth=self.auth.get_auth_tuple(),
                     params=params,
-                    headers=self.auth.get_headers(),
                     timeout=(5, 30)
                 )
                 
@@ -344,11 +366,9 @@ class ConfluenceAPICrawler(BaseCrawler):
                     'limit': 1
                 }
                 
-                response = requests.get(
+                response = self.api_session.get(
                     search_url,
-                    auth=self.auth.get_auth_tuple(),
                     params=params,
-                    headers=self.auth.get_headers(),
                     timeout=(5, 10)
                 )
                 
@@ -377,10 +397,8 @@ class ConfluenceAPICrawler(BaseCrawler):
         
         while next_url:
             try:
-                response = requests.get(
+                response = self.api_session.get(
                     next_url,
-                    auth=self.auth.get_auth_tuple(),
-                    headers=self.auth.get_headers(),
                     timeout=(5, 30)
                 )
                 
@@ -452,21 +470,20 @@ class ConfluenceAPICrawler(BaseCrawler):
             local_path = attachments_dir / local_filename
             
             # Download the attachment (follow redirects for CDN-hosted files)
-            response = requests.get(
+            response = self.api_session.get(
                 download_url,
-                auth=self.auth.get_auth_tuple(),
-                headers=self.auth.get_headers(),
                 timeout=(5, 60),
                 stream=True,
                 allow_redirects=True
             )
             
             if response.status_code == 200:
+                # Copy the socket stream straight into the file in 64 KiB blocks
+                # (decode_content keeps gzip/deflate transfer encodings working)
+                response.raw.decode_content = True
                 with open(local_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                
-                file_size_local = local_path.stat().st_size
+                    shutil.copyfileobj(response.raw, f, 65536)
+                    file_size_local = f.tell()
                 
                 return {
                     'id': attachment_id,
@@ -486,6 +503,8 @@ class ConfluenceAPICrawler(BaseCrawler):
                     'local_path': str(local_path.relative_to(Path(self.output_dir)))
                 }
             else:
+                response.close()  # Unread streamed body, hand the connection back to the pool
+                
                 # Provide more context for the error
                 if response.status_code == 404:
                     # 404 is common for deleted or moved attachments - not critical
@@ -141,7 +141,7 @@ class ConfluenceAuth:
             
             if config_path.exists():
                 with open(config_path, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
+                    config = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
                     
                     if config:
                         # Get base_url from website configuration
@@ -26,14 +26,18 @@ class CrawlerOrchestrator:
     based on site type and credential availability
     """
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, session=None, rate_limiter=None):
         """
         Initialize the orchestrator
         
         Args:
             config: Configuration dictionary
+            session: Optional prebuilt requests.Session handed to the HTML crawler
+            rate_limiter: Optional PerHostLimiter handed to the HTML crawler
         """
         self.config = config
+        self.session = session
+        self.rate_limiter = rate_limiter
         self.start_url = config.get('website', {}).get('start_url', '')
         self.base_url = config.get('website', {}).get('base_url', '')
         
@@ -42,7 +46,10 @@ class CrawlerOrchestrator:
         
         # Initialize shared components
         db_path = config.get('files', {}).get('database_file', 'crawler_data.db')
-        self.db = DatabaseManager(db_path)
+        db_config = config.get('database', {})
+        self.db = DatabaseManager(db_path,
+                                  enable_wal_mode=db_config.get('enable_wal_mode', True),
+                                  cache_size=db_config.get('cache_size'))
         self.progress_tracker = ProgressTracker()
     
     def _load_confluence_auth(self) -> Optional[ConfluenceAuth]:
@@ -177,11 +184,15 @@ class CrawlerOrchestrator:
             
             # WebCrawler already has its own db and progress tracker
             # So we create it without passing our instances
-            return WebCrawler(config=self.config)
+            return WebCrawler(config=self.config, session=self.session, rate_limiter=self.rate_limiter)
     
     def run(self):
         """
         Execute the selected crawler
+        
+        Returns:
+            Result of the crawler's crawl() (pages downloaded for the HTML crawler),
+            None if interrupted
         """
         print("="*70)
         print("🕷️  WEB CRAWLER - Starting")
@@ -202,8 +213,9 @@ class CrawlerOrchestrator:
         crawler = self.create_crawler()
         
         # Run the crawler
+        result = None
         try:
-            crawler.crawl()
+            result = crawler.crawl()
             print("\n✅ Crawling completed successfully!")
         except KeyboardInterrupt:
             print("\n\n⚠️  Crawling interrupted by user")
@@ -212,8 +224,12 @@ class CrawlerOrchestrator:
             print(f"\n\n❌ Crawling failed with error: {e}")
             raise
         finally:
+            if hasattr(crawler, 'close'):
+                crawler.close()
             if hasattr(crawler, 'db'):
                 crawler.db.close()
+        
+        return result
     
     @staticmethod
     def print_configuration_help():
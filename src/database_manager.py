@@ -5,27 +5,205 @@ Handles all database operations for tracking URLs, documents, and resources
 """
 import sqlite3
 import threading
+import queue
+import atexit
 import json
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Set
 import os
 
+class _WriteOp:
+    """A queued write: runs `operation(cursor)` on the writer thread"""
+    __slots__ = ('operation', 'error_message', 'default', 'done', 'result')
+    
+    def __init__(self, operation, error_message, default, done):
+        self.operation = operation
+        self.error_message = error_message
+        self.default = default        # Result reported when the operation fails
+        self.done = done              # threading.Event for callers waiting on the result
+        self.result = default
+
+
 class DatabaseManager:
     """Manages SQLite database operations for web crawler progress tracking"""
     
-    def __init__(self, db_path: str = "crawler_data.db"):
+    # Maximum number of queued writes grouped into one transaction
+    WRITE_BATCH_SIZE = 256
+    
+    def __init__(self, db_path: str = "crawler_data.db", enable_wal_mode: bool = True, cache_size: int = None):
         self.db_path = db_path
+        self.enable_wal_mode = enable_wal_mode
+        self.cache_size = cache_size  # SQLite cache size in pages (None keeps the SQLite default)
         self.db_lock = threading.Lock()
         self._init_database()
+        
+        # Per-thread connections for the lookups workers make on every resource;
+        # SQLite serves concurrent readers itself, so these skip db_lock
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        
+        # Resources recorded in this process, visible to lookups as soon as the write is
+        # queued (the reader connections only see it once the writer has committed)
+        self._resource_paths = {}  # url -> local_path
+        self._hash_paths = {}  # content_hash -> local_path
+        
+        # All writes go through a single writer thread that groups them into transactions
+        self._write_queue = queue.Queue()
+        self._writer_thread = None
+        self._writer_lock = threading.Lock()
+        atexit.register(self._stop_writer)
+    
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        """Open a connection with the per-connection performance pragmas applied"""
+        conn = sqlite3.connect(self.db_path, **kwargs)
+        if self.enable_wal_mode:
+            # Under WAL, NORMAL only syncs at checkpoints: a crash may lose the last commits but never corrupts the file
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        if self.cache_size:
+            conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        return conn
+    
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's long-lived read connection (opened on first use)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect(check_same_thread=False)  # So close() can close it from another thread
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    def _ensure_writer(self):
+        """Start the writer thread on first use (or again after close)"""
+        if self._writer_thread is None or not self._writer_thread.is_alive():
+            with self._writer_lock:
+                if self._writer_thread is None or not self._writer_thread.is_alive():
+                    self._writer_thread = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+                    self._writer_thread.start()
+    
+    def _writer_loop(self):
+        """Drain queued writes and apply them in grouped transactions on one connection"""
+        conn = None
+        try:
+            conn = self._connect(isolation_level=None)  # Transactions managed manually
+            cursor = conn.cursor()
+            while True:
+                op = self._write_queue.get()
+                if op is None:
+                    return
+                
+                # Greedily take whatever else is already waiting
+                batch = [op]
+                stop = False
+                while len(batch) < self.WRITE_BATCH_SIZE:
+                    try:
+                        op = self._write_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if op is None:
+                        stop = True
+                        break
+                    batch.append(op)
+                
+                self._apply_batch(cursor, batch)
+                if stop:
+                    return
+        except Exception as e:
+            # Without a writer nothing would ever signal the queued ops, fail them instead
+            print(f"❌ Database writer stopped: {e}")
+            self._fail_queued()
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def _fail_queued(self):
+        """Complete every queued write with its default result"""
+        while True:
+            try:
+                op = self._write_queue.get_nowait()
+            except queue.Empty:
+                return
+            if op is not None:
+                op.result = op.default
+                if op.done is not None:
+                    op.done.set()
+    
+    def _apply_batch(self, cursor, batch):
+        """Apply a batch in one transaction, each op in its own savepoint so one failure doesn't undo the rest"""
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for op in batch:
+                if op.operation is None:
+                    continue  # Flush marker
+                cursor.execute("SAVEPOINT write_op")
+                try:
+                    op.result = op.operation(cursor)
+                    cursor.execute("RELEASE write_op")
+                except Exception as e:
+                    print(f"❌ {op.error_message}: {e}")
+                    op.result = op.default
+                    cursor.execute("ROLLBACK TO write_op")
+                    cursor.execute("RELEASE write_op")
+            cursor.execute("COMMIT")
+        except Exception as e:
+            print(f"❌ Error committing database writes: {e}")
+            for op in batch:
+                op.result = op.default
+            try:
+                cursor.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+        finally:
+            for op in batch:
+                if op.done is not None:
+                    op.done.set()
+    
+    def _write(self, operation, error_message, default=False, wait=False):
+        """Queue a write; returns its result when `wait` is set, True once queued otherwise"""
+        op = _WriteOp(operation, error_message, default, threading.Event() if wait else None)
+        self._ensure_writer()
+        self._write_queue.put(op)
+        if not wait:
+            return True
+        # Re-check the writer periodically: if it died after this op was queued, nobody
+        # would signal it
+        while not op.done.wait(1.0):
+            thread = self._writer_thread
+            if thread is None or not thread.is_alive():
+                self._fail_queued()
+                if not op.done.is_set():
+                    return op.default  # Not in the queue anymore: the dead writer had taken it
+                break
+        return op.result
+    
+    def flush(self):
+        """Block until every write queued so far has been committed"""
+        if self._writer_thread is not None and self._writer_thread.is_alive():
+            self._write(None, "Error flushing database writes", default=True, wait=True)
+    
+    def _stop_writer(self):
+        """Commit pending writes and stop the writer thread"""
+        with self._writer_lock:
+            thread = self._writer_thread
+            if thread is not None and thread.is_alive():
+                self._write_queue.put(None)
+                thread.join()
+            self._writer_thread = None
     
     def _init_database(self):
         """Initialize database with required tables"""
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 
+                # Journal mode is stored in the database file, so setting it once here covers every connection
+                if self.enable_wal_mode:
+                    cursor.execute("PRAGMA journal_mode=WAL")
+                
                 # Table for discovered URLs and their processing status
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS discovered_urls (
@@ -79,14 +257,31 @@ class DatabaseManager:
                         download_time REAL,
                         downloaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         referenced_by TEXT,
-                        is_transversal BOOLEAN DEFAULT FALSE
+                        is_transversal BOOLEAN DEFAULT FALSE,
+                        content_hash TEXT
                     )
                 """)
                 
+                # Add content_hash to databases created before it existed
+                cursor.execute("PRAGMA table_info(downloaded_resources)")
+                resource_columns = {row[1] for row in cursor.fetchall()}
+                if 'content_hash' not in resource_columns:
+                    cursor.execute("ALTER TABLE downloaded_resources ADD COLUMN content_hash TEXT")
+                
                 # Create indexes for downloaded_resources
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_downloaded_resources_url ON downloaded_resources(url)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_downloaded_resources_type ON downloaded_resources(resource_type)")
                 cursor.execute("CREATE INDEX IF NOT EXISTS idx_downloaded_resources_referenced_by ON downloaded_resources(referenced_by)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_downloaded_resources_content_hash ON downloaded_resources(content_hash)")
+                
+                # Table for resource download ownership (one claim per URL per crawl)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS resource_claims (
+                        url TEXT PRIMARY KEY,
+                        status TEXT DEFAULT 'claimed',
+                        claimed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
                 
                 # Table for URL mapping (clean URL to local path)
                 cursor.execute("""
@@ -216,51 +411,34 @@ class DatabaseManager:
                 conn.close()
     
     def add_discovered_url(self, url: str, clean_url: str, depth: int, parent_url: str = None) -> bool:
-        """Add a newly discovered URL to the database"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR IGNORE INTO discovered_urls 
-                    (url, clean_url, depth, parent_url, status) 
-                    VALUES (?, ?, ?, ?, 'pending')
-                """, (url, clean_url, depth, parent_url))
-                
-                conn.commit()
-                return cursor.rowcount > 0
-            except Exception as e:
-                print(f"❌ Error adding discovered URL {url}: {e}")
-                conn.rollback()
-                return False
-            finally:
-                conn.close()
+        """Queue a newly discovered URL to be added to the database"""
+        def operation(cursor):
+            cursor.execute("""
+                INSERT OR IGNORE INTO discovered_urls 
+                (url, clean_url, depth, parent_url, status) 
+                VALUES (?, ?, ?, ?, 'pending')
+            """, (url, clean_url, depth, parent_url))
+            return cursor.rowcount > 0
+        
+        return self._write(operation, f"Error adding discovered URL {url}")
     
     def add_discovered_urls_batch(self, urls_data: List[Tuple[str, str, int, str]]) -> int:
-        """Add multiple discovered URLs in a batch operation"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                cursor.executemany("""
-                    INSERT OR IGNORE INTO discovered_urls 
-                    (url, clean_url, depth, parent_url, status) 
-                    VALUES (?, ?, ?, ?, 'pending')
-                """, [(url, clean_url, depth, parent_url) for url, clean_url, depth, parent_url in urls_data])
-                
-                conn.commit()
-                return cursor.rowcount
-            except Exception as e:
-                print(f"❌ Error adding discovered URLs batch: {e}")
-                conn.rollback()
-                return 0
-            finally:
-                conn.close()
+        """Add multiple discovered URLs in a batch operation, returns how many were new"""
+        def operation(cursor):
+            cursor.executemany("""
+                INSERT OR IGNORE INTO discovered_urls 
+                (url, clean_url, depth, parent_url, status) 
+                VALUES (?, ?, ?, ?, 'pending')
+            """, [(url, clean_url, depth, parent_url) for url, clean_url, depth, parent_url in urls_data])
+            return cursor.rowcount
+        
+        return self._write(operation, "Error adding discovered URLs batch", default=0, wait=True)
     
     def get_pending_urls(self, limit: int = None) -> List[Tuple[str, int]]:
         """Get pending URLs to download"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 query = """
@@ -281,8 +459,9 @@ class DatabaseManager:
     
     def get_total_discovered_urls(self) -> int:
         """Get total count of discovered URLs"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM discovered_urls")
@@ -295,8 +474,9 @@ class DatabaseManager:
     
     def get_total_downloaded_documents(self) -> int:
         """Get total count of successfully downloaded documents"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM discovered_urls WHERE status = 'completed'")
@@ -309,8 +489,9 @@ class DatabaseManager:
     
     def get_total_failed_urls(self) -> int:
         """Get total count of failed URLs"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM discovered_urls WHERE status = 'failed'")
@@ -322,112 +503,109 @@ class DatabaseManager:
                 conn.close()
     
     def mark_url_downloading(self, clean_url: str) -> bool:
-        """Mark a URL as currently being downloaded"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE discovered_urls 
-                    SET status = 'downloading' 
-                    WHERE clean_url = ? AND status = 'pending'
-                """, (clean_url,))
-                
-                conn.commit()
-                return cursor.rowcount > 0
-            except Exception as e:
-                print(f"❌ Error marking URL as downloading {clean_url}: {e}")
-                conn.rollback()
-                return False
-            finally:
-                conn.close()
+        """Mark a URL as currently being downloaded, returns False if it was not pending"""
+        def operation(cursor):
+            cursor.execute("""
+                UPDATE discovered_urls 
+                SET status = 'downloading' 
+                WHERE clean_url = ? AND status = 'pending'
+            """, (clean_url,))
+            return cursor.rowcount > 0
+        
+        return self._write(operation, f"Error marking URL as downloading {clean_url}", wait=True)
     
     def mark_url_completed(self, clean_url: str, local_path: str, file_size: int = None, 
                           download_time: float = None, links_extracted: int = 0, depth: int = None) -> bool:
-        """Mark a URL as successfully downloaded"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                
-                # Update discovered_urls status
-                cursor.execute("""
-                    UPDATE discovered_urls 
-                    SET status = 'completed' 
-                    WHERE clean_url = ?
-                """, (clean_url,))
-                
-                # Add to downloaded_documents
-                cursor.execute("""
-                    INSERT OR REPLACE INTO downloaded_documents 
-                    (url, clean_url, local_path, file_size, download_time, depth, links_extracted) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (clean_url, clean_url, local_path, file_size, download_time, depth, links_extracted))
-                
-                # Add to url_mappings
-                cursor.execute("""
-                    INSERT OR REPLACE INTO url_mappings 
-                    (clean_url, local_path) 
-                    VALUES (?, ?)
-                """, (clean_url, local_path))
-                
-                conn.commit()
-                return True
-            except Exception as e:
-                print(f"❌ Error marking URL as completed {clean_url}: {e}")
-                conn.rollback()
-                return False
-            finally:
-                conn.close()
+        """Queue marking a URL as successfully downloaded"""
+        def operation(cursor):
+            # Update discovered_urls status
+            cursor.execute("""
+                UPDATE discovered_urls 
+                SET status = 'completed' 
+                WHERE clean_url = ?
+            """, (clean_url,))
+            
+            # Add to downloaded_documents
+            cursor.execute("""
+                INSERT OR REPLACE INTO downloaded_documents 
+                (url, clean_url, local_path, file_size, download_time, depth, links_extracted) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (clean_url, clean_url, local_path, file_size, download_time, depth, links_extracted))
+            
+            # Add to url_mappings
+            cursor.execute("""
+                INSERT OR REPLACE INTO url_mappings 
+                (clean_url, local_path) 
+                VALUES (?, ?)
+            """, (clean_url, local_path))
+            return True
+        
+        return self._write(operation, f"Error marking URL as completed {clean_url}")
     
     def mark_url_failed(self, clean_url: str, error_message: str = None) -> bool:
-        """Mark a URL as failed to download"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE discovered_urls 
-                    SET status = 'failed', error_message = ?, retry_count = retry_count + 1 
-                    WHERE clean_url = ?
-                """, (error_message, clean_url))
-                
-                conn.commit()
-                return cursor.rowcount > 0
-            except Exception as e:
-                print(f"❌ Error marking URL as failed {clean_url}: {e}")
-                conn.rollback()
-                return False
-            finally:
-                conn.close()
+        """Queue marking a URL as failed to download"""
+        def operation(cursor):
+            cursor.execute("""
+                UPDATE discovered_urls 
+                SET status = 'failed', error_message = ?, retry_count = retry_count + 1 
+                WHERE clean_url = ?
+            """, (error_message, clean_url))
+            return cursor.rowcount > 0
+        
+        return self._write(operation, f"Error marking URL as failed {clean_url}")
     
     def add_downloaded_resource(self, url: str, local_path: str, resource_type: str, 
                                file_size: int = None, download_time: float = None, 
-                               referenced_by: str = None, is_transversal: bool = False) -> bool:
-        """Add a downloaded resource to the database"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO downloaded_resources 
-                    (url, local_path, resource_type, file_size, download_time, referenced_by, is_transversal) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (url, local_path, resource_type, file_size, download_time, referenced_by, is_transversal))
-                
-                conn.commit()
-                return True
-            except Exception as e:
-                print(f"❌ Error adding downloaded resource {url}: {e}")
-                conn.rollback()
-                return False
-            finally:
-                conn.close()
+                               referenced_by: str = None, is_transversal: bool = False,
+                               content_hash: str = None) -> bool:
+        """Queue adding a downloaded resource to the database"""
+        # Single dict stores are atomic under the GIL
+        self._resource_paths[url] = local_path
+        if content_hash:
+            self._hash_paths.setdefault(content_hash, local_path)
+        
+        def operation(cursor):
+            cursor.execute("""
+                INSERT OR REPLACE INTO downloaded_resources 
+                (url, local_path, resource_type, file_size, download_time, referenced_by, is_transversal, content_hash) 
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (url, local_path, resource_type, file_size, download_time, referenced_by, is_transversal, content_hash))
+            return True
+        
+        return self._write(operation, f"Error adding downloaded resource {url}")
+    
+    def claim_resource(self, url: str) -> bool:
+        """Atomically claim a resource for download, returns False if another worker owns it"""
+        def operation(cursor):
+            cursor.execute(
+                "INSERT INTO resource_claims (url) VALUES (?) ON CONFLICT(url) DO NOTHING", (url,))
+            return cursor.rowcount == 1
+        
+        return self._write(operation, f"Error claiming resource {url}", wait=True)
+    
+    def finish_resource_claim(self, url: str, success: bool) -> bool:
+        """Mark a claimed resource as done, or drop the claim on failure so it can be retried"""
+        def operation(cursor):
+            if success:
+                cursor.execute("UPDATE resource_claims SET status = 'done' WHERE url = ?", (url,))
+            else:
+                cursor.execute("DELETE FROM resource_claims WHERE url = ?", (url,))
+            return True
+        
+        return self._write(operation, f"Error releasing resource claim {url}")
+    
+    def clear_resource_claims(self) -> bool:
+        """Drop claims left over from a previous run"""
+        def operation(cursor):
+            cursor.execute("DELETE FROM resource_claims")
+            return True
+        
+        return self._write(operation, "Error clearing resource claims")
     
     def get_downloaded_urls(self) -> Set[str]:
         """Get set of all downloaded URLs"""
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT clean_url FROM downloaded_documents")
@@ -441,7 +619,7 @@ class DatabaseManager:
     def get_downloaded_resources(self) -> Set[str]:
         """Get set of all downloaded resource URLs"""
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT url FROM downloaded_resources")
@@ -455,7 +633,7 @@ class DatabaseManager:
     def get_url_to_filename_mapping(self) -> Dict[str, str]:
         """Get mapping of URLs to local filenames"""
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT clean_url, local_path FROM url_mappings")
@@ -469,7 +647,7 @@ class DatabaseManager:
     def get_transversal_resources(self) -> Dict[str, str]:
         """Get mapping of transversal resource URLs to local paths"""
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -483,39 +661,75 @@ class DatabaseManager:
             finally:
                 conn.close()
     
+    # Lookups below run on the calling thread's reader connection without db_lock.
+    # They use fetchall() so no statement is left open holding a stale read snapshot.
+    # Queued writes aren't visible there until committed, so resources recorded by
+    # this process are answered from memory first.
+    
     def is_resource_downloaded(self, url: str) -> bool:
         """Check if a resource has already been downloaded"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                cursor.execute("SELECT 1 FROM downloaded_resources WHERE url = ? LIMIT 1", (url,))
-                return cursor.fetchone() is not None
-            except Exception as e:
-                print(f"❌ Error checking if resource downloaded {url}: {e}")
-                return False
-            finally:
-                conn.close()
+        if url in self._resource_paths:
+            return True
+        try:
+            rows = self._reader().execute("SELECT 1 FROM downloaded_resources WHERE url = ? LIMIT 1", (url,)).fetchall()
+            return bool(rows)
+        except Exception as e:
+            print(f"❌ Error checking if resource downloaded {url}: {e}")
+            return False
     
     def get_resource_path(self, url: str) -> Optional[str]:
         """Get local path for a downloaded resource"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                cursor.execute("SELECT local_path FROM downloaded_resources WHERE url = ? LIMIT 1", (url,))
-                result = cursor.fetchone()
-                return result[0] if result else None
-            except Exception as e:
-                print(f"❌ Error getting resource path {url}: {e}")
-                return None
-            finally:
-                conn.close()
+        local_path = self._resource_paths.get(url)
+        if local_path is not None:
+            return local_path
+        try:
+            rows = self._reader().execute("SELECT local_path FROM downloaded_resources WHERE url = ? LIMIT 1", (url,)).fetchall()
+            return rows[0][0] if rows else None
+        except Exception as e:
+            print(f"❌ Error getting resource path {url}: {e}")
+            return None
+    
+    def get_resources_status_bulk(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """Get local paths for many resources at once (None for resources not downloaded)"""
+        status = dict.fromkeys(urls)
+        if not status:
+            return status
+        
+        try:
+            conn = self._reader()
+            unique_urls = list(status)
+            # Stay below SQLite's default limit on bound parameters
+            for i in range(0, len(unique_urls), 500):
+                chunk = unique_urls[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                status.update(conn.execute(f"SELECT url, local_path FROM downloaded_resources WHERE url IN ({placeholders})", chunk).fetchall())
+        except Exception as e:
+            print(f"❌ Error getting resource status in bulk: {e}")
+        
+        # Writes still queued for the writer thread
+        for url in status:
+            local_path = self._resource_paths.get(url)
+            if local_path is not None:
+                status[url] = local_path
+        return status
+    
+    def get_resource_by_content_hash(self, content_hash: str) -> Optional[str]:
+        """Get local path of a downloaded resource with the given content hash"""
+        local_path = self._hash_paths.get(content_hash)
+        if local_path is not None:
+            return local_path
+        try:
+            rows = self._reader().execute("SELECT local_path FROM downloaded_resources WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchall()
+            return rows[0][0] if rows else None
+        except Exception as e:
+            print(f"❌ Error getting resource by content hash {content_hash}: {e}")
+            return None
     
     def get_stats(self) -> Dict:
         """Get crawler statistics"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 
@@ -555,7 +769,7 @@ class DatabaseManager:
     def cleanup_old_data(self, days: int = 30):
         """Clean up old crawler data"""
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("""
@@ -573,8 +787,9 @@ class DatabaseManager:
     
     def export_to_json(self, output_file: str = "crawler_backup.json"):
         """Export database content to JSON for backup"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 
@@ -600,8 +815,9 @@ class DatabaseManager:
     
     def get_total_urls_count(self) -> int:
         """Get total count of URLs in the database"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM discovered_urls")
@@ -614,8 +830,9 @@ class DatabaseManager:
     
     def reset_progress(self) -> bool:
         """Reset crawling progress while preserving file structure knowledge"""
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 
@@ -624,11 +841,14 @@ class DatabaseManager:
                 cursor.execute("DELETE FROM downloaded_documents")
                 cursor.execute("DELETE FROM downloaded_resources")
                 cursor.execute("DELETE FROM url_mappings")
+                cursor.execute("DELETE FROM resource_claims")
                 
                 # Reset auto-increment counters
                 cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('discovered_urls', 'downloaded_documents', 'downloaded_resources', 'url_mappings')")
                 
                 conn.commit()
+                self._resource_paths.clear()
+                self._hash_paths.clear()
                 print("✅ Database progress reset successfully")
                 return True
             except Exception as e:
@@ -649,63 +869,54 @@ class DatabaseManager:
             metadata: Dictionary with Confluence metadata
             
         Returns:
-            True if saved successfully
+            True once queued (failures are reported by the writer thread)
         """
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO confluence_metadata (
-                        url, page_id, ari, title, space_key, space_name, content_type, status,
-                        version_number, version_when, version_by, version_by_email, 
-                        version_by_account, version_message, version_minor_edit,
-                        created_when, created_by, created_by_email, created_by_account,
-                        updated_when, updated_by, updated_by_email, updated_by_account,
-                        web_link, rest_link, tiny_link,
-                        days_since_update, has_attachments, attachment_count
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    url,
-                    metadata.get('id', ''),
-                    metadata.get('ari', ''),
-                    metadata.get('title', ''),
-                    metadata.get('space_key', ''),
-                    metadata.get('space_name', ''),
-                    metadata.get('type', ''),
-                    metadata.get('status', ''),
-                    metadata.get('version', {}).get('number'),
-                    metadata.get('version', {}).get('when'),
-                    metadata.get('version', {}).get('by'),
-                    metadata.get('version', {}).get('by_email'),
-                    metadata.get('version', {}).get('by_account'),
-                    metadata.get('version', {}).get('message'),
-                    metadata.get('version', {}).get('minor_edit', False),
-                    metadata.get('history', {}).get('created', {}).get('when'),
-                    metadata.get('history', {}).get('created', {}).get('by'),
-                    metadata.get('history', {}).get('created', {}).get('by_email'),
-                    metadata.get('history', {}).get('created', {}).get('by_account'),
-                    metadata.get('history', {}).get('updated', {}).get('when'),
-                    metadata.get('history', {}).get('updated', {}).get('by'),
-                    metadata.get('history', {}).get('updated', {}).get('by_email'),
-                    metadata.get('history', {}).get('updated', {}).get('by_account'),
-                    metadata.get('links', {}).get('web'),
-                    metadata.get('links', {}).get('rest'),
-                    metadata.get('links', {}).get('tiny'),
-                    metadata.get('days_since_update'),
-                    metadata.get('has_attachments', False),
-                    metadata.get('attachment_count', 0)
-                ))
-                
-                conn.commit()
-                return True
-            except Exception as e:
-                print(f"❌ Error saving Confluence metadata for {url}: {e}")
-                conn.rollback()
-                return False
-            finally:
-                conn.close()
+        def operation(cursor):
+            cursor.execute("""
+                INSERT OR REPLACE INTO confluence_metadata (
+                    url, page_id, ari, title, space_key, space_name, content_type, status,
+                    version_number, version_when, version_by, version_by_email, 
+                    version_by_account, version_message, version_minor_edit,
+                    created_when, created_by, created_by_email, created_by_account,
+                    updated_when, updated_by, updated_by_email, updated_by_account,
+                    web_link, rest_link, tiny_link,
+                    days_since_update, has_attachments, attachment_count
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                url,
+                metadata.get('id', ''),
+                metadata.get('ari', ''),
+                metadata.get('title', ''),
+                metadata.get('space_key', ''),
+                metadata.get('space_name', ''),
+                metadata.get('type', ''),
+                metadata.get('status', ''),
+                metadata.get('version', {}).get('number'),
+                metadata.get('version', {}).get('when'),
+                metadata.get('version', {}).get('by'),
+                metadata.get('version', {}).get('by_email'),
+                metadata.get('version', {}).get('by_account'),
+                metadata.get('version', {}).get('message'),
+                metadata.get('version', {}).get('minor_edit', False),
+                metadata.get('history', {}).get('created', {}).get('when'),
+                metadata.get('history', {}).get('created', {}).get('by'),
+                metadata.get('history', {}).get('created', {}).get('by_email'),
+                metadata.get('history', {}).get('created', {}).get('by_account'),
+                metadata.get('history', {}).get('updated', {}).get('when'),
+                metadata.get('history', {}).get('updated', {}).get('by'),
+                metadata.get('history', {}).get('updated', {}).get('by_email'),
+                metadata.get('history', {}).get('updated', {}).get('by_account'),
+                metadata.get('links', {}).get('web'),
+                metadata.get('links', {}).get('rest'),
+                metadata.get('links', {}).get('tiny'),
+                metadata.get('days_since_update'),
+                metadata.get('has_attachments', False),
+                metadata.get('attachment_count', 0)
+            ))
+
+            return True
+        
+        return self._write(operation, f"Error saving Confluence metadata for {url}")
     
     def save_confluence_attachments(self, page_url: str, page_id: str, attachments: list) -> bool:
         """
@@ -717,48 +928,39 @@ class DatabaseManager:
             attachments: List of attachment dictionaries
             
         Returns:
-            True if saved successfully
+            True once queued (failures are reported by the writer thread)
         """
         if not attachments:
             return True
         
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            try:
-                cursor = conn.cursor()
-                
-                for attachment in attachments:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO confluence_attachments (
-                            page_url, page_id, attachment_id, title, media_type,
-                            file_size_api, file_size_local, version,
-                            created_when, created_by, comment,
-                            download_url, local_path
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        page_url,
-                        page_id,
-                        attachment.get('id', ''),
-                        attachment.get('title', ''),
-                        attachment.get('media_type', ''),
-                        attachment.get('file_size', 0),
-                        attachment.get('file_size_local', 0),
-                        attachment.get('version', 1),
-                        attachment.get('created', ''),
-                        attachment.get('created_by', ''),
-                        attachment.get('comment', ''),
-                        attachment.get('download_url', ''),
-                        attachment.get('local_path', '')
-                    ))
-                
-                conn.commit()
-                return True
-            except Exception as e:
-                print(f"❌ Error saving Confluence attachments for {page_url}: {e}")
-                conn.rollback()
-                return False
-            finally:
-                conn.close()
+        def operation(cursor):
+            for attachment in attachments:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO confluence_attachments (
+                        page_url, page_id, attachment_id, title, media_type,
+                        file_size_api, file_size_local, version,
+                        created_when, created_by, comment,
+                        download_url, local_path
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    page_url,
+                    page_id,
+                    attachment.get('id', ''),
+                    attachment.get('title', ''),
+                    attachment.get('media_type', ''),
+                    attachment.get('file_size', 0),
+                    attachment.get('file_size_local', 0),
+                    attachment.get('version', 1),
+                    attachment.get('created', ''),
+                    attachment.get('created_by', ''),
+                    attachment.get('comment', ''),
+                    attachment.get('download_url', ''),
+                    attachment.get('local_path', '')
+                ))
+            
+            return True
+        
+        return self._write(operation, f"Error saving Confluence attachments for {page_url}")
     
     def get_confluence_metadata(self, url: str) -> Optional[dict]:
         """
@@ -770,8 +972,9 @@ class DatabaseManager:
         Returns:
             Dictionary with metadata or None if not found
         """
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM confluence_metadata WHERE url = ?", (url,))
@@ -797,8 +1000,9 @@ class DatabaseManager:
         Returns:
             List of attachment dictionaries
         """
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM confluence_attachments WHERE page_url = ?", (page_url,))
@@ -824,8 +1028,9 @@ class DatabaseManager:
         Returns:
             List of page metadata dictionaries
         """
+        self.flush()  # Include writes still queued on the writer thread
         with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             try:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM confluence_metadata WHERE space_key = ?", (space_key,))
@@ -843,5 +1048,16 @@ class DatabaseManager:
 
     def close(self):
         """Close database connections and cleanup"""
-        # SQLite connections are automatically closed when objects are destroyed
+        # Commit anything still queued; other SQLite connections are closed after each call
+        self._stop_writer()
+        
+        # Close the per-thread reader connections (threads reopen one if used again)
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+            self._local = threading.local()
+        for conn in readers:
+            try:
+                conn.close()
+            except Exception:
+                pass
         print("📦 Database manager closed")
\ No newline at end of file
@@ -15,7 +15,7 @@ class DependencyInstaller:
     REQUIRED_PACKAGES = {
         'requests': 'requests>=2.25.0',
         'bs4': 'beautifulsoup4>=4.9.0',
-        'markdownify': 'markdownify>=0.11.0',
+        'markdownify': 'markdownify>=0.13.0',
         'yaml': 'PyYAML>=6.0',
         'rich': 'rich>=13.0.0'
     }
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Output Format for Web Crawler
+Resolves the configured output format once, with its file extension and display label
+"""
+from enum import Enum
+
+
+class OutputFormat(str, Enum):
+    """Supported page output formats (members compare equal to their config strings)"""
+    MARKDOWN = 'markdown'
+    HTML = 'html'
+
+    @classmethod
+    def parse(cls, value):
+        """Resolve a configuration value such as 'Markdown' (raises ValueError if unsupported)"""
+        if isinstance(value, cls):
+            return value
+        return cls(str(value).strip().lower())
+
+    @property
+    def extension(self):
+        """File extension for saved pages"""
+        return _EXTENSIONS[self]
+
+    @property
+    def label(self):
+        """Upper-case name for console messages"""
+        return self.value.upper()
+
+    def __str__(self):
+        return self.value
+
+
+_EXTENSIONS = {OutputFormat.MARKDOWN: '.md', OutputFormat.HTML: '.html'}
@@ -53,7 +53,7 @@ class ProgressTracker:
         self.update_interval = 0.5  # Update every 500ms
         
     def update_stat(self, key, value=None, increment=1):
-        """Thread-safe update of statistics"""
+        """Thread-safe update of statistics (rendering happens on the Live refresh)"""
         with self.stats_lock:
             if value is not None:
                 self.stats[key] = value
@@ -61,13 +61,10 @@ class ProgressTracker:
                 self.stats[key] += increment
                 
             # Calculate pages per second
-            elapsed = (datetime.now() - self.start_time).total_seconds()
-            if elapsed > 0:
-                self.stats['pages_per_second'] = self.stats['urls_downloaded'] / elapsed
-            
-            # Update progress bar if URLs were discovered or downloaded
-            if key in ['urls_discovered', 'urls_downloaded'] and self.url_task is not None:
-                self.update_progress_bar()
+            if key == 'urls_downloaded':
+                elapsed = (datetime.now() - self.start_time).total_seconds()
+                if elapsed > 0:
+                    self.stats['pages_per_second'] = self.stats['urls_downloaded'] / elapsed
     
     def initialize_progress_bar(self, initial_total=1):
         """Initialize the progress bar with initial total"""
@@ -133,6 +130,10 @@ class ProgressTracker:
             return 100.0
         return (self.stats['urls_downloaded'] / total) * 100
     
+    def __rich__(self):
+        """Render the current state, lets Rich Live poll the tracker on its own refresh"""
+        return self.create_progress_panel()
+    
     def create_progress_panel(self):
         """Create the main progress panel with table and progress bar"""
         # Create the statistics table
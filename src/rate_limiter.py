@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter for Web Crawler
+Per-host politeness delay and robots.txt cache shared by crawler workers
+"""
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+
+class PerHostLimiter:
+    """Enforces a minimum delay between requests to the same host.
+
+    Each host has its own lock, held only while a worker reserves its time slot, so
+    workers fetching from different hosts never wait on each other and requests to
+    the same host are spaced out without serializing the sleeps. A delay of 0/None
+    disables throttling.
+    """
+
+    def __init__(self, min_delay=None):
+        self.min_delay = max(0.0, float(min_delay or 0))
+        self._next = {}  # host -> earliest monotonic time the next request may start
+        self._locks = defaultdict(threading.Lock)
+        self._locks_lock = threading.Lock()
+
+    def _host_lock(self, host):
+        """Get (or create) the lock for a host"""
+        with self._locks_lock:
+            return self._locks[host]
+
+    def wait(self, url_or_host):
+        """Block until a request to this host is allowed"""
+        if self.min_delay <= 0:
+            return
+
+        host = urlsplit(url_or_host).netloc if '://' in url_or_host else url_or_host
+        # Reserve the next slot under the lock, then sleep without holding it
+        with self._host_lock(host):
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.min_delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RobotsCache:
+    """Fetches and caches robots.txt once per host.
+
+    The shared lock only guards the cache; each origin's robots.txt is fetched under
+    that origin's own lock, so a slow host never blocks lookups for other hosts.
+    """
+
+    def __init__(self, session, user_agent='*', timeout=10, log=print):
+        self.session = session
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.log = log  # Callable for warnings, None to stay silent
+        self._parsers = {}  # scheme://host -> RobotFileParser
+        self._fetch_locks = defaultdict(threading.Lock)  # scheme://host -> lock held while fetching
+        self._lock = threading.Lock()
+
+    def _get_parser(self, origin):
+        """Get the parsed robots.txt for an origin, fetching it on first use"""
+        with self._lock:
+            parser = self._parsers.get(origin)
+            if parser is not None:
+                return parser
+            fetch_lock = self._fetch_locks[origin]
+
+        # Only workers waiting on this origin queue here; the first one fetches
+        with fetch_lock:
+            parser = self._parsers.get(origin)
+            if parser is not None:
+                return parser
+
+            parser = RobotFileParser(f"{origin}/robots.txt")
+            try:
+                response = self.session.get(parser.url, timeout=self.timeout)
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(response.text.splitlines())
+            except Exception as e:
+                if self.log is not None:
+                    self.log(f"⚠️  Could not fetch {parser.url}: {e}")
+                parser.allow_all = True
+
+            with self._lock:
+                self._parsers[origin] = parser
+                self._fetch_locks.pop(origin, None)
+            return parser
+
+    def can_fetch(self, url):
+        """Check whether robots.txt allows fetching this URL"""
+        parts = urlsplit(url)
+        parser = self._get_parser(f"{parts.scheme}://{parts.netloc}")
+        return parser.can_fetch(self.user_agent, url)
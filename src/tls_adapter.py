@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+TLS Adapter for Web Crawler
+HTTPAdapter whose HTTPS connections share SSL contexts with their CA bundle loaded once
+"""
+import os
+import threading
+
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.util.ssl_ import create_urllib3_context
+
+_contexts = {}  # CA bundle file -> SSL context with it loaded
+_contexts_lock = threading.Lock()
+
+
+def shared_ssl_context(cafile=None):
+    """SSL context with a CA bundle file loaded (the requests default if None), built once per process"""
+    cafile = cafile or DEFAULT_CA_BUNDLE_PATH
+    with _contexts_lock:
+        context = _contexts.get(cafile)
+        if context is None:
+            context = create_urllib3_context()
+            context.load_verify_locations(cafile)
+            _contexts[cafile] = context
+        return context
+
+
+def _bundle_file(verify):
+    """CA bundle file a requests `verify` value points at, or None if it isn't a bundle file"""
+    if verify is True:
+        return DEFAULT_CA_BUNDLE_PATH
+    if isinstance(verify, str) and os.path.isfile(verify):
+        return verify
+    return None
+
+
+class PreloadedTLSAdapter(HTTPAdapter):
+    """HTTPAdapter that verifies HTTPS against shared, preloaded SSL contexts.
+
+    By default requests hands the CA bundle path to every connection pool and urllib3
+    parses the bundle again for each new TLS connection. Here each bundle file (the
+    default one, or a path from `verify` / REQUESTS_CA_BUNDLE) is parsed once per process.
+    verify=False and CA directories keep the stock behaviour, as do requests versions
+    before 2.32, which don't have build_connection_pool_key_attributes.
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        cafile = _bundle_file(verify)
+        if cafile:
+            pool_kwargs['ssl_context'] = shared_ssl_context(cafile)
+            pool_kwargs.pop('ca_certs', None)
+        return host_params, pool_kwargs
+
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+        if url.lower().startswith('https') and getattr(conn, 'conn_kw', {}).get('ssl_context') is not None:
+            # The bundle is already loaded into the pool's shared context
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
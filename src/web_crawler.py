@@ -12,14 +12,22 @@ import re
 import sys
 import time
 import json
+import argparse
 import shutil
+import socket
+import selectors
+import hashlib
+import importlib
+import importlib.util
 import urllib.parse
+from functools import lru_cache
 from pathlib import Path
-from collections import deque
+from collections import deque, OrderedDict
 from urllib.parse import urljoin, urlparse, unquote
 import subprocess
+import multiprocessing
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 
 # Auto-install dependencies if missing
@@ -49,8 +57,9 @@ if auto_install_dependencies and check_dependencies_only:
 
 try:
     import requests
-    from bs4 import BeautifulSoup
-    from markdownify import markdownify as md
+    from urllib3.util.retry import Retry
+    from bs4 import BeautifulSoup, SoupStrainer
+    from markdownify import MarkdownConverter
     import yaml
     from rich.console import Console
     from rich.table import Table
@@ -67,6 +76,9 @@ except ImportError as e:
     print("Or run: python src/dependency_installer.py")
     sys.exit(1)
 
+# libyaml-backed loader when PyYAML was built with it, pure-Python otherwise
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 # Import our database manager
 try:
     # Try importing from current directory first (when run from src/)
@@ -85,6 +97,46 @@ except ImportError:
             print("❌ Error: DatabaseManager not found. Make sure database_manager.py is in src/")
             sys.exit(1)
 
+# Import per-host rate limiter
+try:
+    from rate_limiter import PerHostLimiter, RobotsCache
+except ImportError:
+    try:
+        from src.rate_limiter import PerHostLimiter, RobotsCache
+    except ImportError:
+        print("❌ Error: rate_limiter not found. Make sure rate_limiter.py is in src/")
+        sys.exit(1)
+
+# Import HTTPS adapter with the preloaded CA bundle
+try:
+    from tls_adapter import PreloadedTLSAdapter
+except ImportError:
+    try:
+        from src.tls_adapter import PreloadedTLSAdapter
+    except ImportError:
+        print("❌ Error: tls_adapter not found. Make sure tls_adapter.py is in src/")
+        sys.exit(1)
+
+# Import the memoized URL parser shared with the API crawler
+try:
+    from base_crawler import parse_url
+except ImportError:
+    try:
+        from src.base_crawler import parse_url
+    except ImportError:
+        print("❌ Error: base_crawler not found. Make sure base_crawler.py is in src/")
+        sys.exit(1)
+
+# Import output format
+try:
+    from output_format import OutputFormat
+except ImportError:
+    try:
+        from src.output_format import OutputFormat
+    except ImportError:
+        print("❌ Error: output_format not found. Make sure output_format.py is in src/")
+        sys.exit(1)
+
 # Import progress tracker
 try:
     # Try importing from current directory first (when run from src/)
@@ -97,79 +149,473 @@ except ImportError:
         print("❌ Error: ProgressTracker not found. Make sure progress_tracker.py is in src/")
         sys.exit(1)
 
-# Import crawler orchestrator (optional - will use WebCrawler directly if not available)
-try:
-    from crawler_orchestrator import CrawlerOrchestrator
-    ORCHESTRATOR_AVAILABLE = True
-except ImportError:
+# Crawler orchestrator (optional - will use WebCrawler directly if not available).
+# Only located here; it is imported by main() when actually used, since it pulls in
+# the Confluence API crawler and its dependencies.
+def _find_module(*names):
+    """Returns the first importable module name without importing it"""
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is not None:
+                return name
+        except ImportError:
+            continue  # Parent package (e.g. src) not on the path
+    return None
+
+_ORCHESTRATOR_MODULE = _find_module('crawler_orchestrator', 'src.crawler_orchestrator')
+ORCHESTRATOR_AVAILABLE = _ORCHESTRATOR_MODULE is not None
+
+def _load_orchestrator():
+    """Imports and returns the CrawlerOrchestrator class"""
+    return importlib.import_module(_ORCHESTRATOR_MODULE).CrawlerOrchestrator
+
+def _compile_substrings(patterns):
+    """Compiles substring patterns into one regex alternation (None if there are none)"""
+    if not patterns:
+        return None
+    return re.compile('|'.join(re.escape(str(p)) for p in patterns))
+
+# lxml's C parser is several times faster than the pure-Python html.parser; use it when installed
+LXML_AVAILABLE = _find_module('lxml') is not None
+
+def resolve_html_parser(name='auto'):
+    """Maps the content.html_parser setting to a BeautifulSoup parser name"""
+    if name == 'auto':
+        return 'lxml' if LXML_AVAILABLE else 'html.parser'
+    if name == 'lxml' and not LXML_AVAILABLE:
+        print("⚠️  lxml is not installed, using html.parser")
+        return 'html.parser'
+    return name
+
+# Query string and fragment, stripped by WebCrawler.clean_url
+_URL_SUFFIX_RE = re.compile(r'[?#].*', re.DOTALL)
+
+# Hosts whose CSS and images are downloaded alongside pages
+_ATLASSIAN_RESOURCE_RE = re.compile('|'.join(map(re.escape, [
+    'segurosti.atlassian.net',
+    'media-cdn.atlassian.com',
+    'id-frontend.prod-east.frontend.public.atl-paas.net',
+    'avatar-management--avatars.us-west-2.prod.public.atl-paas.net',
+    'secure.gravatar.com',  # User avatars
+])))
+
+# CDN hosts whose images are kept apart in shared_resources/cdn_images
+_CDN_IMAGE_RE = re.compile('|'.join(map(re.escape, [
+    'media-cdn.atlassian.com',
+    'avatar-management--avatars.us-west-2.prod.public.atl-paas.net',
+    'secure.gravatar.com',
+])))
+
+@lru_cache(maxsize=4096)
+def _relative_dir(target_dir, start_dir):
+    """Relative POSIX-style prefix from start_dir to target_dir (links on a page share few directories)"""
+    relative = os.path.relpath(target_dir or '.', start_dir).replace('\\', '/')
+    return '' if relative == '.' else relative + '/'
+
+def _relative_href(target, start_dir):
+    """Relative href from start_dir to the target file, computed per directory pair"""
+    target_dir, name = os.path.split(str(target))
+    return _relative_dir(target_dir, str(start_dir)) + name
+
+@lru_cache(maxsize=4096)
+def _ensure_dir(path):
+    """Creates a directory (and parents) the first time it is requested in this process"""
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+# Flags for one-shot binary writes (O_BINARY only exists on Windows, O_CLOEXEC only on POSIX)
+_WRITE_FLAGS = (os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+                | getattr(os, 'O_BINARY', 0) | getattr(os, 'O_CLOEXEC', 0))
+
+def _write_file(path, data):
+    """Writes bytes already in memory straight to the file descriptor, without a buffered file object"""
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
     try:
-        from src.crawler_orchestrator import CrawlerOrchestrator
-        ORCHESTRATOR_AVAILABLE = True
-    except ImportError:
-        ORCHESTRATOR_AVAILABLE = False
-        CrawlerOrchestrator = None
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+# Characters that are not allowed in file names on common filesystems
+_BAD_CHARS_RE = re.compile(r'[<>:"|?*]')
+
+@lru_cache(maxsize=100000)
+def _url_to_local_path(url, extension, output_dir):
+    """Local file path for a page URL (cached: every page links to the same targets over and over)"""
+    parsed = urlparse(url)
+    path = parsed.path
+    
+    # Create relative path based on site structure
+    # Remove common prefixes if configured
+    if path.startswith('/wiki/'):
+        path = path[6:]  # For Confluence-type sites
+    elif path.startswith('/docs/'):
+        path = path[6:]  # For documentation sites
+    elif path.startswith('/help/'):
+        path = path[6:]  # For help sites
+    
+    # If path is empty, use index
+    if not path or path == '/':
+        path = 'index'
+    
+    # Convert to file path with appropriate extension
+    if path.endswith('/'):
+        path += f'index{extension}'
+    elif not path.endswith(('.html', '.md')):
+        path += extension
+    
+    # Clean problematic characters
+    path = _BAD_CHARS_RE.sub('_', path)
+    path = unquote(path)
+    
+    # Ensure path is relative and within output directory
+    path = path.lstrip('/')
+    return f"{output_dir}/{path}"
+
+def parse_cookies_file(cookies_file):
+    """Parses a cookies file (HTTP cookie string or Netscape format) into a name -> value dict"""
+    cookies = {}
+    with open(cookies_file, 'r') as f:
+        content = f.read().strip()
+        
+        # If it's HTTP string format (separated by ;)
+        if ';' in content:
+            for cookie_pair in content.split(';'):
+                cookie_pair = cookie_pair.strip()
+                if '=' in cookie_pair:
+                    name, value = cookie_pair.split('=', 1)
+                    cookies[name.strip()] = value.strip()
+        else:
+            # Netscape format (separated by tabs)
+            for line in content.split('\n'):
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    parts = line.split('\t')
+                    if len(parts) >= 7:
+                        domain, flag, path, secure, expiration, name, value = parts[:7]
+                        cookies[name] = value
+    return cookies
+
+def build_session(config, cookies=None):
+    """
+    Builds the HTTP session for page downloads from configuration:
+    pooled adapter with retries, default headers and cookies from the cookies file
+    (or the already parsed `cookies` dict, so the file isn't read twice)
+    """
+    crawling = config.get('crawling', {})
+    advanced = config.get('advanced', {})
+    
+    session = requests.Session()
+    
+    # Connection pool per host, sized so every page worker and resource fetcher can keep
+    # its connection alive (pages and their images usually come from the same host)
+    max_workers = crawling.get('max_workers', 5)
+    pool_maxsize = crawling.get('pool_maxsize', max_workers + crawling.get('resource_workers', max_workers * 2))
+    adapter = PreloadedTLSAdapter(pool_connections=pool_maxsize,
+                                  pool_maxsize=pool_maxsize,
+                                  max_retries=Retry(total=crawling.get('max_retries', 3), backoff_factor=0.3))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    # Configure HTTP headers, custom ones from configuration take precedence
+    session.headers.update({
+        'User-Agent': advanced.get('user_agent', 
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36'),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Cache-Control': 'max-age=0',
+        'DNT': '1',
+        'Upgrade-Insecure-Requests': '1'
+    })
+    session.headers.update(advanced.get('headers', {}))
+    
+    # Load cookies, scoped to the configured site's host
+    cookies_file = config.get('files', {}).get('cookies_file', 'config/cookies.txt')
+    cookie_domain = urlparse(config.get('website', {}).get('base_url', '')).hostname or ''
+    try:
+        if cookies is None:
+            cookies = parse_cookies_file(cookies_file)
+        for name, value in cookies.items():
+            session.cookies.set(name, value, domain=cookie_domain)
+        print(f"✓ Loaded {len(cookies)} cookies")
+    except Exception as e:
+        print(f"Error loading cookies: {e}")
+    
+    return session
+
+def _make_markdown_converter():
+    """Builds the Markdown converter used for page output"""
+    return MarkdownConverter(
+        heading_style="ATX",  # Use # for headings
+        bullets="-",          # Use - for lists
+        convert=['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 
+                 'ul', 'ol', 'li', 'a', 'strong', 'em', 'code', 'pre',
+                 'blockquote', 'img', 'table', 'tr', 'td', 'th'])
+
+_process_markdown_converter = None
+
+def _html_to_markdown(html, parser='html.parser'):
+    """Converts an HTML fragment to Markdown (runs in markdown worker processes)"""
+    global _process_markdown_converter
+    if _process_markdown_converter is None:
+        _process_markdown_converter = _make_markdown_converter()
+    return _process_markdown_converter.convert_soup(BeautifulSoup(html, parser))
+
+def _url_digest(url):
+    """Fixed-size 16-byte key for a URL (well under half the memory of the URL string itself)"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+class DownloadedURLs:
+    """
+    Set of downloaded URLs that keeps only a 128-bit digest of each URL
+    
+    Membership stays exact for practical purposes (a collision needs ~2^64 URLs),
+    unlike a Bloom filter whose false positives would silently skip pages.
+    """
+    
+    def __init__(self, urls=()):
+        self._digests = {_url_digest(url) for url in urls}
+    
+    def add(self, url):
+        self._digests.add(_url_digest(url))
+    
+    def __contains__(self, url):
+        return _url_digest(url) in self._digests
+    
+    def __len__(self):
+        return len(self._digests)
+
+class ShardedURLSet:
+    """
+    Thread-safe set of URLs split across shards
+    
+    Claims use dict.setdefault, a single atomic step for str keys, so no lock is
+    taken at all; sharding keeps each dict small as the crawl grows.
+    """
+    
+    def __init__(self, shards=16):
+        self._mask = shards - 1  # shards must be a power of two
+        self._shards = [{} for _ in range(shards)]
+    
+    def add_if_absent(self, url):
+        """Adds the URL, returns False if it was already present"""
+        token = object()
+        return self._shards[hash(url) & self._mask].setdefault(url, token) is token
+    
+    def discard(self, url):
+        self._shards[hash(url) & self._mask].pop(url, None)
+    
+    def __contains__(self, url):
+        return url in self._shards[hash(url) & self._mask]
+    
+    def __len__(self):
+        return sum(len(urls) for urls in self._shards)
+
+class SeenURLs:
+    """
+    Thread-safe record of URLs already handed to the scheduler
+    
+    URLs are reduced to a canonical key first (lower-case scheme and host, no default
+    port, no fragment, sorted query, no trailing slash), so the same page linked in
+    slightly different ways from every page's navigation is only evaluated once.
+    """
+    
+    _DEFAULT_PORTS = {'http': '80', 'https': '443'}
+    
+    def __init__(self, urls=()):
+        self._seen = {}  # Digests of canonical keys (dict for its atomic setdefault)
+        for url in urls:
+            self._seen[_url_digest(self.canonical(url))] = True
+    
+    @classmethod
+    def canonical(cls, url):
+        """Canonical key for a URL"""
+        parsed = parse_url(url)
+        scheme = parsed.scheme.lower()
+        try:
+            host = parsed.hostname or ''
+            if ':' in host:
+                host = f"[{host}]"  # IPv6 literal
+            port = parsed.port
+        except ValueError:
+            host, port = parsed.netloc.lower(), None  # Malformed port, keep netloc as is
+        if port is not None and str(port) != cls._DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        path = parsed.path.rstrip('/') or '/'
+        query = '&'.join(sorted(parsed.query.split('&'))) if parsed.query else ''
+        return f"{scheme}://{host}{path}?{query}" if query else f"{scheme}://{host}{path}"
+    
+    def add_if_new(self, url):
+        """Records the URL, returns True only the first time its canonical form is seen"""
+        # setdefault checks and inserts in one atomic step, only one caller gets its token back
+        token = object()
+        return self._seen.setdefault(_url_digest(self.canonical(url)), token) is token
+    
+    def __contains__(self, url):
+        return _url_digest(self.canonical(url)) in self._seen
+    
+    def __len__(self):
+        return len(self._seen)
+
+class HostQueue:
+    """FIFO queue of (url, depth) items grouped by host.
+    
+    Items are handed out in bursts of up to `burst` consecutive URLs from the same
+    host before rotating to the next one, so pooled keep-alive connections get reused.
+    Supports the subset of the deque API the crawler uses. Thread-safe: workers push
+    discovered links while the scheduler pops, each under the queue's own short lock.
+    """
+    
+    def __init__(self, items=(), burst=8):
+        self._queues = OrderedDict()  # host -> deque of items, in rotation order
+        self._length = 0
+        self._burst = max(1, burst)
+        self._served = 0  # Items served from the current head host
+        self._lock = threading.Lock()
+        self.extend(items)
+    
+    @staticmethod
+    def _host(url):
+        """Cheap netloc extraction for absolute URLs"""
+        parts = url.split('/', 3)
+        return parts[2] if len(parts) > 2 else ''
+    
+    def _append(self, item):
+        """Append without locking (caller holds self._lock)"""
+        host = self._host(item[0])
+        queue = self._queues.get(host)
+        if queue is None:
+            queue = self._queues[host] = deque()
+        queue.append(item)
+        self._length += 1
+    
+    def append(self, item):
+        with self._lock:
+            self._append(item)
+    
+    def extend(self, items):
+        with self._lock:
+            for item in items:
+                self._append(item)
+    
+    def popleft(self):
+        with self._lock:
+            if not self._length:
+                raise IndexError("pop from an empty HostQueue")
+            host, queue = next(iter(self._queues.items()))
+            item = queue.popleft()
+            self._length -= 1
+            self._served += 1
+            if not queue:
+                del self._queues[host]
+                self._served = 0
+            elif self._served >= self._burst:
+                # Burst exhausted, give the other hosts a turn
+                self._queues.move_to_end(host)
+                self._served = 0
+            return item
+    
+    def __len__(self):
+        return self._length
+    
+    def __bool__(self):
+        return self._length > 0
 
 class WebCrawler:
-    def __init__(self, config=None):
+    def __init__(self, config=None, session=None, rate_limiter=None):
         # Load configuration from YAML or use defaults
         if config:
             self.config = config
         else:
             self.config = self.load_default_config()
         
+        # Resolve each configuration section once; per-page code reads the attributes below
+        website = self.config.get('website', {})
+        crawling = self.config.get('crawling', {})
+        output = self.config.get('output', {})
+        files = self.config.get('files', {})
+        
         # Website configuration
-        self.base_url = self.config.get('website', {}).get('base_url', '')
-        self.base_domain = self.config.get('website', {}).get('base_domain', '')
-        self.start_url = self.config.get('website', {}).get('start_url', '')
-        self.valid_url_patterns = self.config.get('website', {}).get('valid_url_patterns', [])
-        self.exclude_patterns = self.config.get('website', {}).get('exclude_patterns', [])
+        self.base_url = website.get('base_url', '')
+        self.base_domain = website.get('base_domain', '')
+        self.start_url = website.get('start_url', '')
+        self.valid_url_patterns = website.get('valid_url_patterns', [])
+        self.exclude_patterns = website.get('exclude_patterns', [])
+        # Patterns are plain substrings, each list is matched as one compiled alternation
+        self._exclude_re = _compile_substrings(self.exclude_patterns)
+        self._valid_re = _compile_substrings(self.valid_url_patterns)
         
         # Crawling parameters
-        self.max_depth = self.config.get('crawling', {}).get('max_depth', 1)
-        self.space = self.config.get('crawling', {}).get('space_name', 'DEFAULT')
-        self.max_workers = self.config.get('crawling', {}).get('max_workers', 5)
-        self.request_delay = self.config.get('crawling', {}).get('request_delay', 0.5)
-        self.request_timeout = self.config.get('crawling', {}).get('request_timeout', 30)
+        self.max_depth = crawling.get('max_depth', 1)
+        self.space = crawling.get('space_name', 'DEFAULT')
+        self.max_workers = crawling.get('max_workers', 5)
+        self.request_delay = crawling.get('request_delay')  # None: no per-host throttling
+        self.request_timeout = crawling.get('request_timeout', 30)
+        self.host_burst = crawling.get('host_burst', 8)
         
         # Output configuration
-        self.output_format = self.config.get('output', {}).get('format', 'markdown').lower()
-        self.output_dir = self.config.get('output', {}).get('output_dir', 'downloaded_content')
-        self.resources_dir = self.config.get('output', {}).get('resources_dir', 'shared_resources')
+        self.output_format = OutputFormat.parse(output.get('format', 'markdown'))
+        self.output_dir = output.get('output_dir', 'downloaded_content')
+        self.resources_dir = output.get('resources_dir', 'shared_resources')
+        self.download_resources_enabled = self.config.get('content', {}).get('download_resources', True)
+        self.html_parser = resolve_html_parser(self.config.get('content', {}).get('html_parser', 'auto'))
         
         # Files and paths
-        self.cookies_file = self.config.get('files', {}).get('cookies_file', 'config/cookies.txt')
-        self.db_path = self.config.get('files', {}).get('database_file', 'crawler_data.db')
+        self.cookies_file = files.get('cookies_file', 'config/cookies.txt')
+        self.db_path = files.get('database_file', 'crawler_data.db')
         
         # Initialize database manager
-        self.db = DatabaseManager(self.db_path)
+        db_config = self.config.get('database', {})
+        self.db = DatabaseManager(self.db_path,
+                                  enable_wal_mode=db_config.get('enable_wal_mode', True),
+                                  cache_size=db_config.get('cache_size'))
         
         # Initialize progress tracker
         self.progress_tracker = ProgressTracker()
         
         # Internal state
-        self.session = requests.Session()
-        self.download_queue = deque()
+        # HTTP session with cookies and headers (built once by main() and shared when given)
+        self.session = session if session is not None else build_session(self.config)
+        
+        # Politeness: minimum delay between requests per host, optional robots.txt
+        self.rate_limiter = rate_limiter if rate_limiter is not None else PerHostLimiter(self.request_delay)
+        self.robots = None
+        if self.config.get('crawling', {}).get('respect_robots', False):
+            quiet = self.config.get('logging', {}).get('quiet', False)
+            self.robots = RobotsCache(self.session, self.session.headers.get('User-Agent', '*'),
+                                      log=None if quiet else self._log)
+        self.download_queue = HostQueue(burst=self.host_burst)
         
         # Load state from database
-        self.downloaded_urls = self.db.get_downloaded_urls()
-        self.active_downloads = set()  # Track URLs currently being downloaded
+        self.downloaded_urls = DownloadedURLs(self.db.get_downloaded_urls())
+        self.active_downloads = ShardedURLSet()  # Track URLs currently being downloaded
         self.downloaded_resources = self.db.get_downloaded_resources()
         self.url_to_filename = self.db.get_url_to_filename_mapping()
         self.transversal_resources = self.db.get_transversal_resources()
         
+        # Links already evaluated in this run, so repeated navigation links are skipped early
+        self.seen_urls = SeenURLs()
+        
+        # Resource ownership is tracked in the database, claims from an interrupted run are stale
+        self.db.clear_resource_claims()
+        
+        # Per-page progress lines are written in batches (fewer writes and Live redraws)
+        self.log_buffer = []
+        self.log_buffer_lines = self.config.get('logging', {}).get('buffer_lines', 50)
+        self.log_urls = self.config.get('logging', {}).get('log_urls', True)
+        self.log_resources = self.config.get('logging', {}).get('log_resources', True)
+        # Indentation per depth level, built once instead of per progress line
+        self._indents = ['  ' * level for level in range(self.max_depth + 1)]
+        self.log_lock = threading.Lock()
+        
         # Granular lock system for thread-safety
-        self.download_lock = threading.Lock()
         self.progress_lock = threading.Lock()
-        self.queue_lock = threading.Lock()
-        self.resource_lock = threading.Lock()
-        self.active_downloads = set()
-        self.active_resources = set()
-        self.url_locks = {}
-        self.resource_locks = {}
         
         # Create folder for shared resources
         self.shared_resources_dir = Path(f"{self.output_dir}/{self.resources_dir}")
         self.shared_resources_dir.mkdir(parents=True, exist_ok=True)
+        # CDN images subfolder, created on the first resource written into it
+        self._cdn_dir = self.shared_resources_dir / "cdn_images"
         
         # Setup output directories with .gitkeep files
         self.setup_output_directories()
@@ -177,11 +623,47 @@ class WebCrawler:
         # Load pending URLs from database
         self.load_progress()
         
-        # Load cookies
-        self.load_cookies()
+        # URL filters don't change during a crawl, so validity checks can be memoized
+        self._is_valid_url_cached = lru_cache(maxsize=65536)(self._check_valid_url)
+        
+        # Skip fragment-only, non-HTTP (mailto:, javascript:, ...) and off-domain anchors while parsing
+        href_filter = r'^(?!#|[a-z][a-z0-9+.-]*:)'
+        if self.base_domain:
+            href_filter += r'|^(?:https?:)?//' + re.escape(self.base_domain) + r'(?:[/?#]|$)'
+        else:
+            href_filter += r'|^https?://'
+        self._link_href_re = re.compile(href_filter, re.IGNORECASE)
+        self.link_strainer = SoupStrainer('a', href=self._link_href_re)
+        
+        # Page downloads share one long-lived pool (threads and their pooled connections are reused)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='crawler')
+        
+        # Page resources are downloaded here, off the page workers' pool (a page task
+        # waiting on its own pool could deadlock once every worker is busy)
+        self.resource_executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='resources')
+        # Individual resource fetches fan out here; they never wait on other tasks, so no deadlock
+        resource_workers = self.config.get('crawling', {}).get('resource_workers', self.max_workers * 2)
+        self.resource_fetch_executor = ThreadPoolExecutor(max_workers=resource_workers,
+                                                          thread_name_prefix='resource-fetch')
+        
+        # Page serializer for each output format, looked up once per page
+        self.renderers = {
+            OutputFormat.MARKDOWN: self.render_markdown,
+            OutputFormat.HTML: self.render_html,
+        }
         
-        # Setup headers from config
-        self.setup_headers()
+        # Markdown converter is stateless between pages, build it once
+        self.markdown_converter = _make_markdown_converter()
+        
+        # Optionally convert to Markdown in worker processes, outside the GIL shared by the page threads
+        self.markdown_pool = None
+        markdown_processes = self.config.get('content', {}).get('markdown_processes', 0)
+        if markdown_processes and self.output_format == 'markdown':
+            start_methods = multiprocessing.get_all_start_methods()
+            # forkserver avoids forking a process that already runs threads
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in start_methods else None)
+            self.markdown_pool = ProcessPoolExecutor(max_workers=markdown_processes, mp_context=context)
     
     def load_default_config(self):
         """Loads default configuration if none provided"""
@@ -197,7 +679,7 @@ class WebCrawler:
                 'max_depth': 1,
                 'space_name': 'DEFAULT',
                 'max_workers': 5,
-                'request_delay': 0.5,
+                'request_delay': None,
                 'request_timeout': 30
             },
             'output': {
@@ -211,24 +693,6 @@ class WebCrawler:
             }
         }
     
-    def setup_headers(self):
-        """Configures HTTP headers from configuration"""
-        default_headers = {
-            'User-Agent': self.config.get('advanced', {}).get('user_agent', 
-                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36'),
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Cache-Control': 'max-age=0',
-            'DNT': '1',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        
-        # Add custom headers from configuration
-        custom_headers = self.config.get('advanced', {}).get('headers', {})
-        default_headers.update(custom_headers)
-        
-        self.session.headers.update(default_headers)
-
     def setup_output_directories(self):
         """Create output directories and add .gitkeep files"""
         # Create main output directory
@@ -252,61 +716,31 @@ class WebCrawler:
         try:
             config_path = 'config/config.yml'
             if os.path.exists(config_path):
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    updated_config = yaml.safe_load(f)
-                    # Update configuration while preserving critical runtime state
-                    if updated_config:
-                        # Only update safe-to-change settings during runtime
-                        content_settings = updated_config.get('content', {})
-                        if 'download_resources' in content_settings:
-                            self.config.setdefault('content', {})['download_resources'] = content_settings['download_resources']
-                            print(f"🔄 Config reloaded: download_resources = {content_settings['download_resources']}")
-                        
-                        output_settings = updated_config.get('output', {})
-                        if 'format' in output_settings:
-                            old_format = self.output_format
-                            self.output_format = output_settings['format'].lower()
-                            if old_format != self.output_format:
-                                print(f"🔄 Config reloaded: output_format = {self.output_format}")
+                updated_config = read_yaml_config(config_path)
+                # Update configuration while preserving critical runtime state
+                if updated_config:
+                    # Only update safe-to-change settings during runtime
+                    content_settings = updated_config.get('content', {})
+                    if 'download_resources' in content_settings:
+                        self.config.setdefault('content', {})['download_resources'] = content_settings['download_resources']
+                        self.download_resources_enabled = content_settings['download_resources']
+                        print(f"🔄 Config reloaded: download_resources = {content_settings['download_resources']}")
+                    
+                    output_settings = updated_config.get('output', {})
+                    if 'format' in output_settings:
+                        old_format = self.output_format
+                        self.output_format = OutputFormat.parse(output_settings['format'])
+                        if old_format != self.output_format:
+                            print(f"🔄 Config reloaded: output_format = {self.output_format}")
         except Exception as e:
             print(f"⚠️ Error reloading config: {e}")
 
-    def load_cookies(self):
-        """Loads cookies from file in HTTP cookie string format"""
-        cookies = {}
-        try:
-            with open(self.cookies_file, 'r') as f:
-                content = f.read().strip()
-                
-                # If it's HTTP string format (separated by ;)
-                if ';' in content:
-                    for cookie_pair in content.split(';'):
-                        cookie_pair = cookie_pair.strip()
-                        if '=' in cookie_pair:
-                            name, value = cookie_pair.split('=', 1)
-                            cookies[name.strip()] = value.strip()
-                else:
-                    # Netscape format (separated by tabs)
-                    for line in content.split('\n'):
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            parts = line.split('\t')
-                            if len(parts) >= 7:
-                                domain, flag, path, secure, expiration, name, value = parts[:7]
-                                cookies[name] = value
-            
-            for name, value in cookies.items():
-                self.session.cookies.set(name, value, domain='segurosti.atlassian.net')
-            print(f"✓ Loaded {len(cookies)} cookies")
-        except Exception as e:
-            print(f"Error loading cookies: {e}")
-
     def load_progress(self):
         """Loads pending URLs from database"""
         try:
             # Get pending URLs from database
             pending_urls = self.db.get_pending_urls()
-            self.download_queue = deque(pending_urls)
+            self.download_queue = HostQueue(pending_urls, burst=self.host_burst)
             
             # Get statistics
             stats = self.db.get_stats()
@@ -331,59 +765,59 @@ class WebCrawler:
         pass
 
     def acquire_url_lock(self, url):
-        """Acquires an exclusive lock for a specific URL"""
-        with self.download_lock:
-            # If URL is already being processed, don't continue
-            if url in self.active_downloads:
-                return False
-            # If already downloaded, don't continue
-            if url in self.downloaded_urls:
-                return False
-            # Mark as active and create lock if it doesn't exist
-            self.active_downloads.add(url)
-            if url not in self.url_locks:
-                self.url_locks[url] = threading.Lock()
-        
-        # Acquire the specific URL lock
-        self.url_locks[url].acquire()
-        return True
+        """Claims a URL for exclusive processing, False if it is already active or downloaded"""
+        # If already downloaded, don't continue
+        if url in self.downloaded_urls:
+            return False
+        # Only one caller can add the URL to its shard of the active set
+        return self.active_downloads.add_if_absent(url)
 
     def release_url_lock(self, url):
-        """Releases the lock for a specific URL"""
-        if url in self.url_locks:
-            self.url_locks[url].release()
-        with self.download_lock:
-            self.active_downloads.discard(url)
-
-    def acquire_resource_lock(self, resource_url):
-        """Acquires an exclusive lock for a specific resource"""
-        with self.resource_lock:
-            # If resource is already being processed, don't continue
-            if resource_url in self.active_resources:
-                return False
-            # If already downloaded, don't continue
-            if resource_url in self.downloaded_resources:
-                return False
-            # Mark as active and create lock if it doesn't exist
-            self.active_resources.add(resource_url)
-            if resource_url not in self.resource_locks:
-                self.resource_locks[resource_url] = threading.Lock()
-        
-        # Acquire the specific resource lock
-        self.resource_locks[resource_url].acquire()
-        return True
+        """Releases the claim on a URL"""
+        self.active_downloads.discard(url)
+
+    def _indent(self, depth):
+        """Indentation for a progress line about a URL at the given depth"""
+        level = self.max_depth - depth
+        if 0 <= level < len(self._indents):
+            return self._indents[level]
+        return '  ' * max(level, 0)  # Depth from a previous run with another max_depth
+
+    def _log_url(self, depth, message):
+        """Buffers an indented per-URL progress line (skipped when logging.log_urls is off)"""
+        if self.log_urls:
+            self._log(self._indent(depth) + message)
+
+    def _log_resource(self, message):
+        """Buffers a resource progress line (skipped when logging.log_resources is off)"""
+        if self.log_resources:
+            self._log(self._indents[-1] + message)
 
-    def release_resource_lock(self, resource_url):
-        """Releases the lock for a specific resource"""
-        if resource_url in self.resource_locks:
-            self.resource_locks[resource_url].release()
-        with self.resource_lock:
-            self.active_resources.discard(resource_url)
+    def _log(self, message):
+        """Buffers a progress line, writing the buffer once it reaches log_buffer_lines"""
+        with self.log_lock:
+            self.log_buffer.append(message)
+            if len(self.log_buffer) < self.log_buffer_lines:
+                return
+            lines = self._take_log_buffer()
+        # Write outside log_lock so other workers keep buffering while stdout blocks
+        print('\n'.join(lines))
+
+    def flush_log(self):
+        """Writes any buffered progress lines"""
+        with self.log_lock:
+            lines = self._take_log_buffer()
+        if lines:
+            print('\n'.join(lines))
+
+    def _take_log_buffer(self):
+        """Detaches the buffered lines, leaving an empty buffer (caller holds log_lock)"""
+        lines, self.log_buffer = self.log_buffer, []
+        return lines
 
     def clean_url(self, url):
         """Cleans a URL by removing parameters, anchors, etc."""
-        parsed = urlparse(url)
-        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+        return _URL_SUFFIX_RE.sub('', url, count=1)
 
     def is_transversal_resource(self, url):
         """Detects if a resource is transversal (common to multiple pages)"""
@@ -394,31 +828,24 @@ class WebCrawler:
     def get_resource_directory(self, url, page_resources_dir):
         """Determines which directory to save the resource in"""
         # All resources are transversal, but organized in different folders
-        if any(cdn_domain in url for cdn_domain in [
-            'media-cdn.atlassian.com',
-            'avatar-management--avatars.us-west-2.prod.public.atl-paas.net',
-            'secure.gravatar.com'
-        ]):
-            # Create subdirectory for CDN images
-            cdn_dir = self.shared_resources_dir / "cdn_images"
-            cdn_dir.mkdir(exist_ok=True)
-            return cdn_dir
+        if _CDN_IMAGE_RE.search(url):
+            # Subdirectory for CDN images
+            return self._cdn_dir
         else:
             # Confluence resources go in the main shared_resources folder
             return self.shared_resources_dir
 
     def is_atlassian_resource(self, url):
         """Checks if a URL is an Atlassian resource we should download"""
-        return any(domain in url for domain in [
-            'segurosti.atlassian.net',
-            'media-cdn.atlassian.com',
-            'id-frontend.prod-east.frontend.public.atl-paas.net',
-            'avatar-management--avatars.us-west-2.prod.public.atl-paas.net',
-            'secure.gravatar.com'  # User avatars
-        ])
+        return _ATLASSIAN_RESOURCE_RE.search(url) is not None
 
     def is_valid_url(self, url):
         """Checks if the URL is valid for download according to configuration"""
+        # Pure function of the URL and the filters set in __init__, memoized per instance
+        return self._is_valid_url_cached(url)
+
+    def _check_valid_url(self, url):
+        """Uncached is_valid_url check"""
         if not url or not url.startswith(('http://', 'https://')):
             return False
         
@@ -428,20 +855,13 @@ class WebCrawler:
         if self.base_domain and parsed.netloc != self.base_domain:
             return False
         
-        # Verificar patrones excluidos
-        for exclude_pattern in self.exclude_patterns:
-            if exclude_pattern in url:
-                return False
+        # Verificar patrones excluidos (one scan for all of them)
+        if self._exclude_re is not None and self._exclude_re.search(url):
+            return False
         
         # Verificar patrones válidos
-        if self.valid_url_patterns:
-            valid = False
-            for valid_pattern in self.valid_url_patterns:
-                if valid_pattern in url:
-                    valid = True
-                    break
-            if not valid:
-                return False
+        if self._valid_re is not None and not self._valid_re.search(url):
+            return False
         
         return True
         
@@ -451,7 +871,8 @@ class WebCrawler:
 
     def extract_links(self, html_content, current_url):
         """Extracts Confluence links from HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # Only build tags for anchors that can lead to a crawlable page
+        soup = BeautifulSoup(html_content, self.html_parser, parse_only=self.link_strainer)
         links = set()
         
         # Find all href links
@@ -463,63 +884,30 @@ class WebCrawler:
             
             if self.is_valid_url(absolute_url):
                 # Clean unnecessary parameters
-                parsed = urlparse(absolute_url)
-                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                links.add(clean_url)
+                links.add(self.clean_url(absolute_url))
         
         return links
 
     def url_to_local_path(self, url):
         """Converts URL to local file path"""
-        parsed = urlparse(url)
-        path = parsed.path
-        
-        # Create relative path based on site structure
-        # Remove common prefixes if configured
-        if path.startswith('/wiki/'):
-            path = path[6:]  # For Confluence-type sites
-        elif path.startswith('/docs/'):
-            path = path[6:]  # For documentation sites
-        elif path.startswith('/help/'):
-            path = path[6:]  # For help sites
-        
-        # If path is empty, use index
-        if not path or path == '/':
-            path = 'index'
-        
-        # Convert to file path with appropriate extension
-        extension = '.md' if self.output_format == 'markdown' else '.html'
-        if path.endswith('/'):
-            path += f'index{extension}'
-        elif not path.endswith(('.html', '.md')):
-            path += extension
-        
-        # Clean problematic characters
-        path = re.sub(r'[<>:"|?*]', '_', path)
-        path = unquote(path)
-        
-        # Ensure path is relative and within output directory
-        path = path.lstrip('/')
-        path = f"{self.output_dir}/{path}"
-        
-        return path
+        return _url_to_local_path(url, self.output_format.extension, self.output_dir)
 
     def download_url(self, url, depth):
         """Downloads a specific URL"""
         # Clean URL for consistency
-        parsed = urlparse(url)
+        parsed = parse_url(url)
         clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
         
         if clean_url in self.downloaded_urls:
             local_path = self.url_to_filename.get(clean_url, "unknown")
-            print(f"{'  ' * (self.max_depth - depth)}🔄 Already downloaded: {Path(local_path).name}")
+            print(f"{self._indent(depth)}🔄 Already downloaded: {Path(local_path).name}")
             return None
         
-        print(f"{'  ' * (self.max_depth - depth)}[Depth {depth}] Downloading: {clean_url}")
+        print(f"{self._indent(depth)}[Depth {depth}] Downloading: {clean_url}")
         
         # Mark as downloading in database
         if not self.db.mark_url_downloading(clean_url):
-            print(f"{'  ' * (self.max_depth - depth)}⚠️ URL already being processed")
+            print(f"{self._indent(depth)}⚠️ URL already being processed")
             return None
         
         start_time = time.time()
@@ -531,7 +919,7 @@ class WebCrawler:
             # Check for authentication errors
             if self.is_authentication_error(response.text, clean_url):
                 error_msg = "Authentication error: Page requires login or cookies expired"
-                print(f"{'  ' * (self.max_depth - depth)}🔐 {error_msg}")
+                print(f"{self._indent(depth)}🔐 {error_msg}")
                 self.show_cookie_help()
                 self.db.mark_url_failed(clean_url, error_msg)
                 return None
@@ -539,23 +927,22 @@ class WebCrawler:
             # Create local directory
             local_path = self.url_to_local_path(clean_url)
             full_path = Path(local_path)
-            full_path.parent.mkdir(parents=True, exist_ok=True)
+            _ensure_dir(full_path.parent)
             
             # Process content before saving
             processed_content = self.process_content(response.text, clean_url, str(full_path))
             
             # Save file
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(processed_content)
+            _write_file(full_path, processed_content)
             
             # Calculate file size and download time
-            file_size = full_path.stat().st_size
+            file_size = len(processed_content)
             download_time = time.time() - start_time
             
             # Extract and save new links
             links_extracted = 0
             if depth > 0:
-                print(f"{'  ' * (self.max_depth - depth)}📋 Extracting links (next depth: {depth-1})")
+                print(f"{self._indent(depth)}📋 Extracting links (next depth: {depth-1})")
                 links = self.extract_links(response.text, clean_url)
                 
                 # Add discovered links to database
@@ -567,9 +954,9 @@ class WebCrawler:
                 
                 if urls_data:
                     links_extracted = self.db.add_discovered_urls_batch(urls_data)
-                    print(f"{'  ' * (self.max_depth - depth)}🔗 Added {links_extracted} new links to database")
+                    print(f"{self._indent(depth)}🔗 Added {links_extracted} new links to database")
             else:
-                print(f"{'  ' * (self.max_depth - depth)}🛑 Depth 0 reached - no more links followed")
+                print(f"{self._indent(depth)}🛑 Depth 0 reached - no more links followed")
             
             # Mark as completed in database
             self.db.mark_url_completed(clean_url, str(full_path), file_size, download_time, links_extracted, depth)
@@ -584,12 +971,12 @@ class WebCrawler:
                 self.progress_tracker.update_stat('urls_discovered', increment=links_extracted)
             self.progress_tracker.update_stat('total_size', increment=file_size)
             
-            print(f"{'  ' * (self.max_depth - depth)}✓ Saved: {local_path} ({file_size:,} bytes)")
+            print(f"{self._indent(depth)}✓ Saved: {local_path} ({file_size:,} bytes)")
             
             return response.text
             
         except Exception as e:
-            print(f"{'  ' * (self.max_depth - depth)}❌ Error downloading {url}: {e}")
+            print(f"{self._indent(depth)}❌ Error downloading {url}: {e}")
             # Mark as failed in database
             self.db.mark_url_failed(clean_url, str(e))
             
@@ -648,35 +1035,38 @@ class WebCrawler:
         # Check if already downloaded using database (non-blocking check)
         if clean_url in self.downloaded_urls:
             local_path = self.url_to_filename.get(clean_url, "unknown")
-            print(f"{'  ' * (self.max_depth - depth)}🔄 Already downloaded: {Path(local_path).name}")
+            self._log_url(depth, f"🔄 Already downloaded: {Path(local_path).name}")
             return None
         
-        # Quick non-blocking check for duplicate processing
-        with self.queue_lock:
-            if clean_url in self.active_downloads:
-                print(f"{'  ' * (self.max_depth - depth)}⚠️ URL already being processed")
-                return None
-            self.active_downloads.add(clean_url)
+        # Quick check for duplicate processing, only contends with workers on the same shard
+        if not self.active_downloads.add_if_absent(clean_url):
+            self._log_url(depth, "⚠️ URL already being processed")
+            return None
         
         start_time = time.time()
         
         try:
-            # Create a new session for this thread (thread-safe) with optimized timeouts
-            local_session = requests.Session()
-            local_session.cookies.update(self.session.cookies)
-            local_session.headers.update(self.session.headers)
-            
             # Optimized timeout settings - connection timeout: 5s, read timeout: 15s
             timeout = (5, 15)  # (connect_timeout, read_timeout)
             
+            # Honor robots.txt when enabled
+            if self.robots is not None and not self.robots.can_fetch(clean_url):
+                self._log_url(depth, f"🚫 Disallowed by robots.txt: {clean_url}")
+                self.db.mark_url_failed(clean_url, "Disallowed by robots.txt")
+                return None
+            
+            # Space out requests to the same host (other hosts are not delayed)
+            self.rate_limiter.wait(clean_url)
+            
             # Perform the download with aggressive timeout
-            response = local_session.get(clean_url, timeout=timeout)
+            # The shared session is safe for concurrent gets; its pool keeps connections alive
+            response = self.session.get(clean_url, timeout=timeout)
             response.raise_for_status()
             
             # Check for authentication errors
             if self.is_authentication_error(response.text, clean_url):
                 error_msg = "Authentication error: Page requires login or cookies expired"
-                print(f"{'  ' * (self.max_depth - depth)}🔐 {error_msg}")
+                self._log_url(depth, f"🔐 {error_msg}")
                 self.show_cookie_help()
                 self.db.mark_url_failed(clean_url, error_msg)
                 return None
@@ -684,43 +1074,45 @@ class WebCrawler:
             # Generate local path
             local_path = self.url_to_local_path(clean_url)
             full_path = Path(local_path)
-            full_path.parent.mkdir(parents=True, exist_ok=True)
+            _ensure_dir(full_path.parent)
             
-            # Process content (this includes cleaning JS, updating links and downloading resources)
-            processed_content = self.process_content(response.text, clean_url, str(full_path))
+            # Process content (this includes cleaning JS, updating links and downloading resources),
+            # collecting the links to follow from the same parse
+            links = set() if depth > 0 else None
+            processed_content = self.process_content(response.text, clean_url, str(full_path), links)
             
             # Save the processed file
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(processed_content)
+            _write_file(full_path, processed_content)
             
             # Calculate file size and download time
-            file_size = full_path.stat().st_size
+            file_size = len(processed_content)
             download_time = time.time() - start_time
             
             # Extract and save new links
             links_extracted = 0
             if depth > 0:
-                print(f"{'  ' * (self.max_depth - depth)}📋 Extracting links (next depth: {depth-1})")
-                links = self.extract_links(response.text, clean_url)
+                self._log_url(depth, f"📋 Extracting links (next depth: {depth-1})")
                 
-                # Add discovered links to database
+                # Add discovered links to database (each link only the first time any page links to it).
+                # Marking a link seen when it is enqueued, not when it completes, means racing
+                # workers that find the same link can't both queue it
                 urls_data = []
+                candidates = []
                 for link in links:
-                    if link not in self.downloaded_urls:
+                    if self.seen_urls.add_if_new(link) and link not in self.downloaded_urls:
                         link_clean = self.clean_url(link)
                         urls_data.append((link, link_clean, depth - 1, clean_url))
+                        candidates.append((link_clean, depth - 1))
                 
                 if urls_data:
                     links_extracted = self.db.add_discovered_urls_batch(urls_data)
-                    print(f"{'  ' * (self.max_depth - depth)}🔗 Added {links_extracted} new links to database")
+                    self._log_url(depth, f"🔗 Added {links_extracted} new links to database")
                     
-                    # Add to download queue for processing
-                    with self.queue_lock:
-                        for link, link_clean, new_depth, parent in urls_data:
-                            if link_clean not in self.downloaded_urls and link_clean not in self.active_downloads:
-                                self.download_queue.append((link_clean, new_depth))
+                    # Add to download queue for processing (one lock acquisition for the batch)
+                    self.download_queue.extend(item for item in candidates
+                                               if item[0] not in self.active_downloads)
             else:
-                print(f"{'  ' * (self.max_depth - depth)}🛑 Depth 0 reached - no more links followed")
+                self._log_url(depth, "🛑 Depth 0 reached - no more links followed")
             
             # Mark as completed in database
             self.db.mark_url_completed(clean_url, str(full_path), file_size, download_time, links_extracted, depth)
@@ -735,12 +1127,12 @@ class WebCrawler:
                 self.progress_tracker.update_stat('urls_discovered', increment=links_extracted)
             self.progress_tracker.update_stat('total_size', increment=file_size)
             
-            print(f"{'  ' * (self.max_depth - depth)}✓ Saved: {local_path} ({file_size:,} bytes)")
+            self._log_url(depth, f"✓ Saved: {local_path} ({file_size:,} bytes)")
             
             return response.text
             
         except Exception as e:
-            print(f"{'  ' * (self.max_depth - depth)}❌ Error downloading {url}: {e}")
+            print(f"{self._indent(depth)}❌ Error downloading {url}: {e}")
             # Mark as failed in database
             self.db.mark_url_failed(clean_url, str(e))
             
@@ -749,77 +1141,112 @@ class WebCrawler:
             
             return None
 
-    def process_content(self, html_content, current_url, filename):
-        """Processes HTML content: updates links, cleans JS, downloads resources and converts to Markdown if necessary"""
+    def process_content(self, html_content, current_url, filename, links=None):
+        """Processes HTML content: updates links, cleans JS, downloads resources and converts to Markdown if necessary.
+        Returns the UTF-8 encoded document ready to be written to disk.
+        When a `links` set is given, it is filled with the crawlable links found while rewriting
+        anchors (same result as extract_links, without parsing the page a second time)."""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, self.html_parser)
             changes_made = False
             
+            # Clean JavaScript first, so resources inside removed <noscript> blocks are skipped
+            self.clean_javascript_in_soup(soup)
+            
+            # Download resources (CSS, images) only if enabled in current config.
+            # Runs in the background while links are rewritten: it only touches <link>/<img>
+            # tags collected here, the link rewrite only touches <a> tags.
+            resources_future = None
+            if self.download_resources_enabled:
+                references = self.collect_resource_references(soup)
+                if references:
+                    resources_future = self.resource_executor.submit(
+                        self.download_resources, soup, current_url, filename, references)
+            
             # Update links
+            current_dir = Path(filename).parent
+            rewritten_hrefs = {}  # Raw href -> local href (None if not a local page)
+            
             for a_tag in soup.find_all('a', href=True):
                 href = a_tag['href']
-                absolute_url = urljoin(current_url, href)
-                
-                # Clean the absolute URL (remove parameters, anchors, etc.)
-                parsed = urlparse(absolute_url)
-                clean_absolute_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
                 
-                # If it's a valid Confluence URL, convert to local path
-                if self.is_valid_url(clean_absolute_url):
-                    # Generate the local path this URL would have
-                    target_local_path = self.url_to_local_path(clean_absolute_url)
-                    target_file = Path(target_local_path)
-                    
-                    # Calculate relative path from current file
-                    current_dir = Path(filename).parent
+                # Navigation links repeat on every page, resolve each href only once
+                if href in rewritten_hrefs:
+                    new_href = rewritten_hrefs[href]
+                else:
+                    new_href = rewritten_hrefs[href] = self._compute_local_href(href, current_url, current_dir)
                     
-                    try:
-                        relative_path = os.path.relpath(target_file, current_dir)
-                        # Ensure link has correct extension
-                        expected_extension = '.md' if self.output_format == 'markdown' else '.html'
-                        if not relative_path.endswith((expected_extension, '.html', '.md')):
-                            relative_path += expected_extension
-                        a_tag['href'] = relative_path.replace('\\', '/')
-                        changes_made = True
-                    except ValueError:
-                        # If relative path cannot be calculated, use absolute local
-                        target_path = str(target_file).replace('\\', '/')
-                        expected_extension = '.md' if self.output_format == 'markdown' else '.html'
-                        if not target_path.endswith((expected_extension, '.html', '.md')):
-                            target_path += expected_extension
-                        a_tag['href'] = target_path
-                        changes_made = True
-            
-            # Clean JavaScript
-            self.clean_javascript_in_soup(soup)
+                    # Collect crawlable links in the same pass (same rules as extract_links)
+                    if links is not None and self._link_href_re.search(href):
+                        absolute_url = urljoin(current_url, href)
+                        if self.is_valid_url(absolute_url):
+                            links.add(self.clean_url(absolute_url))
+                
+                if new_href is not None:
+                    a_tag['href'] = new_href
+                    changes_made = True
             
-            # Download resources (CSS, images) only if enabled in current config
-            if self.config.get('content', {}).get('download_resources', True):
-                self.download_resources(soup, current_url, filename)
+            # Wait for resource references to be rewritten before serializing
+            if resources_future is not None:
+                resources_future.result()
             
-            # Convert to Markdown if necessary
-            if self.output_format == 'markdown':
-                # Extract only main content (remove navigation, etc.)
-                main_content = self.extract_main_content(soup)
-                markdown_content = md(str(main_content), 
-                                    heading_style="ATX",  # Use # for headings
-                                    bullets="-",          # Use - for lists
-                                    convert=['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 
-                                            'ul', 'ol', 'li', 'a', 'strong', 'em', 'code', 'pre',
-                                            'blockquote', 'img', 'table', 'tr', 'td', 'th'])
-                
-                # Add metadata at the beginning
-                metadata = f"# {soup.title.string if soup.title else 'Confluence Page'}\n\n"
-                metadata += f"**Original URL:** {current_url}\n\n"
-                metadata += "---\n\n"
-                
-                return metadata + markdown_content
-            else:
-                return str(soup)
+            # Serialize in the configured output format
+            return self.renderers[self.output_format](soup, current_url)
                 
         except Exception as e:
             print(f"❌ Error processing content from {filename}: {e}")
-            return html_content
+            if links is not None:
+                links.clear()
+                links.update(self.extract_links(html_content, current_url))
+            return html_content.encode('utf-8')
+
+    def render_markdown(self, soup, current_url):
+        """Renders the page's main content as Markdown bytes, with a title and source header"""
+        # Extract only main content (remove navigation, etc.)
+        main_content = self.extract_main_content(soup)
+        if self.markdown_pool is not None:
+            # Ship the serialized fragment to a worker process; this thread waits without the GIL
+            markdown_content = self.markdown_pool.submit(
+                _html_to_markdown, str(main_content), self.html_parser).result()
+        else:
+            # Convert the parsed tag directly instead of stringifying and re-parsing it
+            markdown_content = self.markdown_converter.convert_soup(main_content)
+        
+        # Add metadata at the beginning
+        metadata = f"# {soup.title.string if soup.title else 'Confluence Page'}\n\n"
+        metadata += f"**Original URL:** {current_url}\n\n"
+        metadata += "---\n\n"
+        
+        return (metadata + markdown_content).encode('utf-8')
+
+    def render_html(self, soup, current_url):
+        """Renders the whole cleaned page as HTML bytes"""
+        # Serialize straight to UTF-8 bytes, no intermediate str
+        return soup.encode('utf-8', formatter='minimal')
+
+    def _compute_local_href(self, href, current_url, current_dir):
+        """Local relative href for a link on a page in current_dir, or None if it isn't a crawlable page"""
+        # Clean the absolute URL (remove parameters, anchors, etc.)
+        clean_absolute_url = self.clean_url(urljoin(current_url, href))
+        
+        # Only valid Confluence URLs are converted to local paths
+        if not self.is_valid_url(clean_absolute_url):
+            return None
+        
+        # Generate the local path this URL would have
+        target_file = Path(self.url_to_local_path(clean_absolute_url))
+        try:
+            # Calculate relative path from current file (memoized per directory pair)
+            new_href = _relative_href(target_file, current_dir)
+        except ValueError:
+            # If relative path cannot be calculated, use absolute local
+            new_href = str(target_file).replace('\\', '/')
+        
+        # Ensure link has correct extension
+        expected_extension = self.output_format.extension
+        if not new_href.endswith((expected_extension, '.html', '.md')):
+            new_href += expected_extension
+        return new_href
 
     def extract_main_content(self, soup):
         """Extracts main page content, removing navigation and unnecessary elements"""
@@ -855,10 +1282,14 @@ class WebCrawler:
             script.decompose()
         
         # Remove JavaScript events
-        for tag in soup.find_all():
-            for attr in list(tag.attrs.keys()):
-                if attr.lower().startswith('on'):  # onclick, onload, etc.
-                    del tag.attrs[attr]
+        # Both html.parser and lxml lowercase attribute names, so a prefix slice is enough
+        # (catches non-standard handlers too, not just the WHATWG event names)
+        for tag in soup.find_all(True):
+            attrs = tag.attrs
+            if attrs:
+                handlers = [attr for attr in attrs if attr[:2] == 'on']
+                for attr in handlers:
+                    del attrs[attr]
         
         # Remove meta refresh
         for meta in soup.find_all('meta', attrs={'http-equiv': 'refresh'}):
@@ -868,61 +1299,86 @@ class WebCrawler:
         for noscript in soup.find_all('noscript'):
             noscript.decompose()
 
-    def download_resources(self, soup, base_url, html_file_path):
+    def collect_resource_references(self, soup):
+        """Returns (tag, attribute, resource_type) for every stylesheet and image in the page"""
+        references = [(link, 'href', 'css') for link in soup.find_all('link', rel='stylesheet') if link.get('href')]
+        references += [(img, 'src', 'img') for img in soup.find_all('img') if img.get('src')]
+        return references
+
+    def download_resources(self, soup, base_url, html_file_path, references=None):
         """Downloads resources (CSS, images, etc.) referenced in HTML"""
-        page_resources_dir = Path(html_file_path).parent / "resources"
-        page_resources_dir.mkdir(exist_ok=True)
+        if references is None:
+            references = self.collect_resource_references(soup)
+        
+        html_dir = Path(html_file_path).parent
+        # Only passed through to get_resource_directory, which stores everything under shared
+        # resources; directories are created when a file is actually written
+        page_resources_dir = html_dir / "resources"
+        resolved = {}  # Raw href/src -> local relative path (None if not downloaded)
+        
+        # Look up the download status of every reference in one query
+        resource_urls = {}  # Raw href/src -> absolute URL of a resource we handle
+        for tag, attr, resource_type in references:
+            raw_url = tag[attr]
+            if raw_url not in resource_urls:
+                resource_url = urljoin(base_url, raw_url)
+                resource_urls[raw_url] = resource_url if self.is_atlassian_resource(resource_url) else None
+        known_paths = self.db.get_resources_status_bulk([u for u in resource_urls.values() if u])
+        
+        # Start every missing download at once; fetches are leaf tasks on their own pool
+        pending = {}  # Raw href/src -> future returning the local file path
+        for tag, attr, resource_type in references:
+            raw_url = tag[attr]
+            resource_url = resource_urls[raw_url]
+            if raw_url in resolved or raw_url in pending:
+                continue
+            if not resource_url:
+                resolved[raw_url] = None
+                continue
+            existing_path = known_paths.get(resource_url)
+            if existing_path and Path(existing_path).exists():
+                self._log_resource(f"📎 Resource already downloaded: {Path(existing_path).name}")
+                resolved[raw_url] = _relative_href(existing_path, html_dir)
+            else:
+                target_dir = self.get_resource_directory(resource_url, page_resources_dir)
+                pending[raw_url] = self.resource_fetch_executor.submit(
+                    self.download_single_resource, resource_url, target_dir, resource_type)
         
-        # Download CSS
-        for link in soup.find_all('link', rel='stylesheet'):
-            if link.get('href'):
-                try:
-                    resource_url = urljoin(base_url, link['href'])
-                    if self.is_atlassian_resource(resource_url):
-                        target_dir = self.get_resource_directory(resource_url, page_resources_dir)
-                        filename = self.download_single_resource(resource_url, target_dir, 'css')
-                        if filename:
-                            # Update reference in HTML
-                            relative_path = os.path.relpath(filename, Path(html_file_path).parent)
-                            link['href'] = relative_path.replace('\\', '/')
-                except Exception as e:
-                    print(f"❌ Error downloading CSS {link.get('href')}: {e}")
-        
-        # Download images
-        for img in soup.find_all('img'):
-            if img.get('src'):
-                try:
-                    resource_url = urljoin(base_url, img['src'])
-                    if self.is_atlassian_resource(resource_url):
-                        target_dir = self.get_resource_directory(resource_url, page_resources_dir)
-                        filename = self.download_single_resource(resource_url, target_dir, 'img')
-                        if filename:
-                            # Update reference in HTML
-                            relative_path = os.path.relpath(filename, Path(html_file_path).parent)
-                            img['src'] = relative_path.replace('\\', '/')
-                except Exception as e:
-                    print(f"❌ Error downloading image {img.get('src')}: {e}")
+        # Update references in HTML once their downloads finish
+        for tag, attr, resource_type in references:
+            raw_url = tag[attr]
+            try:
+                if raw_url not in resolved:
+                    filename = pending[raw_url].result()
+                    resolved[raw_url] = _relative_href(filename, html_dir) if filename else None
+                if resolved[raw_url]:
+                    tag[attr] = resolved[raw_url]
+            except Exception as e:
+                resolved[raw_url] = None
+                label = 'CSS' if resource_type == 'css' else 'image'
+                print(f"❌ Error downloading {label} {raw_url}: {e}")
 
     def download_single_resource(self, url, resources_dir, resource_type):
         """Downloads a single resource and returns the filename (thread-safe)"""
         # Check if already downloaded using database
-        if self.db.is_resource_downloaded(url):
-            existing_path = self.db.get_resource_path(url)
-            if existing_path and Path(existing_path).exists():
-                print(f"{'  ' * (self.max_depth - 0)}📎 Resource already downloaded: {Path(existing_path).name}")
-                return existing_path
+        existing_path = self.db.get_resource_path(url)
+        if existing_path and Path(existing_path).exists():
+            self._log_resource(f"📎 Resource already downloaded: {Path(existing_path).name}")
+            return existing_path
         
-        # Try to acquire exclusive lock for this resource
-        if not self.acquire_resource_lock(url):
+        # Claim the resource in the database, only the winning worker downloads it
+        if not self.db.claim_resource(url):
             # If already being processed, check if exists in transversal resources
             if url in self.transversal_resources:
                 existing_file = Path(self.transversal_resources[url])
                 if existing_file.exists():
-                    print(f"{'  ' * (self.max_depth - 0)}📎 Transversal resource already downloaded: {existing_file.name}")
+                    self._log_resource(f"📎 Transversal resource already downloaded: {existing_file.name}")
                     return str(existing_file)
             return None
         
         start_time = time.time()
+        claimed_ok = False
+        is_transversal = self.is_transversal_resource(url)
         
         try:
             # Generate filename
@@ -931,73 +1387,111 @@ class WebCrawler:
             if not filename or '.' not in filename:
                 # Generate name based on type
                 extension = '.css' if resource_type == 'css' else '.png'
-                filename = f"resource_{hash(url) % 10000}{extension}"
+                # Stable across runs, unlike the per-process randomized hash()
+                digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+                filename = f"resource_{digest}{extension}"
             
             file_path = resources_dir / filename
             
             # Check if file already exists locally (double-check with lock)
             if file_path.exists():
-                print(f"{'  ' * (self.max_depth - 0)}📎 Resource already exists: {filename}")
+                self._log_resource(f"📎 Resource already exists: {filename}")
                 
                 # Add to database
                 file_size = file_path.stat().st_size
-                is_transversal = self.is_transversal_resource(url)
                 self.db.add_downloaded_resource(url, str(file_path), resource_type, file_size, None, None, is_transversal)
                 
-                # Thread-safe update
-                with self.resource_lock:
-                    self.downloaded_resources.add(url)
-                    if is_transversal:
-                        self.transversal_resources[url] = str(file_path)
+                # Single set/dict operations are atomic, no lock needed
+                self.downloaded_resources.add(url)
+                if is_transversal:
+                    self.transversal_resources[url] = str(file_path)
+                claimed_ok = True
                 
                 return str(file_path)
             
-            # Create a new session for thread-safety with optimized timeouts
-            local_session = requests.Session()
-            local_session.cookies.update(self.session.cookies)
-            local_session.headers.update(self.session.headers)
-            
             # Much shorter timeout for resources - they should be faster
             timeout = (3, 10)  # (connect_timeout, read_timeout)
-            response = local_session.get(url, timeout=timeout)
-            response.raise_for_status()
-            
-            # Ensure directory exists
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Save file
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+            # Images are already compressed, asking for gzip only adds decode work
+            headers = {'Accept-Encoding': 'identity'} if resource_type == 'img' else None
+            # The context manager returns the connection to the pool even if writing fails
+            with self.session.get(url, timeout=timeout, stream=True, headers=headers) as response:
+                response.raise_for_status()
+                
+                # Ensure directory exists (one mkdir per directory per run)
+                _ensure_dir(file_path.parent)
+                
+                # Stream file to disk in chunks instead of buffering the whole body,
+                # hashing the content on the way to detect duplicates
+                file_size = 0
+                hasher = hashlib.blake2b(digest_size=16)
+                temp_path = file_path.with_name(file_path.name + '.part')
+                try:
+                    with open(temp_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                            hasher.update(chunk)
+                            file_size += len(chunk)
+                
+                    # Identical content already stored under another URL: hard link to it
+                    content_hash = hasher.hexdigest()
+                    existing_path = self.db.get_resource_by_content_hash(content_hash)
+                    linked = False
+                    if existing_path and existing_path != str(file_path) and Path(existing_path).exists():
+                        try:
+                            os.link(existing_path, file_path)
+                            linked = True
+                        except OSError:
+                            pass  # Different filesystem or no hard link support, keep the copy
+                
+                    if linked:
+                        temp_path.unlink()
+                    else:
+                        os.replace(temp_path, file_path)
+                finally:
+                    if temp_path.exists():
+                        temp_path.unlink()
             
-            # Calculate file size and download time
-            file_size = file_path.stat().st_size
+            # Calculate download time
             download_time = time.time() - start_time
             
             # Add to database
-            is_transversal = self.is_transversal_resource(url)
-            self.db.add_downloaded_resource(url, str(file_path), resource_type, file_size, download_time, None, is_transversal)
+            self.db.add_downloaded_resource(url, str(file_path), resource_type, file_size, download_time, None,
+                                            is_transversal, content_hash)
+            
+            # Single set/dict operations are atomic, no lock needed
+            self.downloaded_resources.add(url)
+            if is_transversal:
+                self.transversal_resources[url] = str(file_path)
+                self._log_resource(f"📎 Transversal resource saved: {filename}")
+            else:
+                self._log_resource(f"📎 Specific resource saved: {filename}")
+            
+            # Update progress tracker
+            self.progress_tracker.update_stat('resources_downloaded')
+            self.progress_tracker.update_stat('total_size', increment=file_size)
+            claimed_ok = True
             
-            # Thread-safe state update
-            with self.resource_lock:
-                self.downloaded_resources.add(url)
-                if is_transversal:
-                    self.transversal_resources[url] = str(file_path)
-                    print(f"{'  ' * (self.max_depth - 0)}📎 Transversal resource saved: {filename}")
-                else:
-                    print(f"{'  ' * (self.max_depth - 0)}📎 Specific resource saved: {filename}")
-                
-                # Update progress tracker
-                self.progress_tracker.update_stat('resources_downloaded')
-                self.progress_tracker.update_stat('total_size', increment=file_size)
-                
             return str(file_path)
             
         except Exception as e:
             print(f"❌ Error downloading resource {url}: {e}")
             return None
         finally:
-            # Always release the resource lock
-            self.release_resource_lock(url)
+            # Keep the claim on success, drop it on failure so the resource can be retried
+            self.db.finish_resource_claim(url, claimed_ok)
+
+    def close(self):
+        """Stops the crawler's worker pools (the shared HTTP session is left to its owner)"""
+        self.executor.shutdown(wait=True)
+        self.resource_executor.shutdown(wait=True)
+        self.resource_fetch_executor.shutdown(wait=True)
+        self.shutdown_markdown_pool()
+
+    def shutdown_markdown_pool(self, wait=True):
+        """Stops the Markdown worker processes, if any (later pages convert in-thread)"""
+        if self.markdown_pool is not None:
+            self.markdown_pool.shutdown(wait=wait)
+            self.markdown_pool = None
 
     def download_recursive(self, start_url):
         """Recursively downloads from the initial URL using parallelism"""
@@ -1039,96 +1533,69 @@ class WebCrawler:
         initial_total = max(total_discovered, existing_downloaded + len(self.download_queue), 1)
         self.progress_tracker.initialize_progress_bar(initial_total)
         
-        # Start progress display with Rich Live
-        with Live(self.progress_tracker.create_progress_panel(), refresh_per_second=2) as live:
+        # Start progress display with Rich Live (re-renders the tracker on each refresh)
+        with Live(self.progress_tracker, refresh_per_second=2) as live:
             try:
-                # Process download queue with true parallelism
-                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    # Submit all URLs to the thread pool at once for true parallelism
-                    active_futures = {}
-                    future_start_times = {}  # Track when each future started
-                    max_future_timeout = 60  # Maximum time to allow a future to run (seconds)
-                    
-                    while self.download_queue or active_futures:
-                        # Cancel futures that are taking too long
-                        current_time = time.time()
-                        futures_to_cancel = []
-                        for future, start_time in future_start_times.items():
-                            if current_time - start_time > max_future_timeout:
-                                futures_to_cancel.append(future)
-                        
-                        for future in futures_to_cancel:
-                            if future in active_futures:
-                                url_depth = active_futures.pop(future)
-                                future.cancel()  # Try to cancel
-                                future_start_times.pop(future, None)
-                                self.progress_tracker.increment_stat('urls_failed')
-                                self.progress_tracker.update_stat('last_error', f'Timeout after {max_future_timeout}s: {url_depth[0]}')
-                                print(f"⏰ Cancelled timeout future: {url_depth[0]}")
-                        
-                        # Submit new jobs while we have capacity and pending URLs
-                        while len(active_futures) < self.max_workers and self.download_queue:
-                            url_depth = self.download_queue.popleft()
-                            future = executor.submit(self.download_url_parallel, url_depth)
-                            active_futures[future] = url_depth
-                            future_start_times[future] = current_time
-                            
-                            # Update progress tracker
-                            self.progress_tracker.update_stat('urls_queued', len(self.download_queue))
-                            self.progress_tracker.update_stat('active_threads', len(active_futures))
-                            live.update(self.progress_tracker.create_progress_panel())
-                        
-                        # Process completed jobs
-                        if active_futures:
-                            # Check for completed futures with a very short timeout to avoid blocking
-                            completed_futures = []
-                            
-                            # Use a very short timeout to keep the system responsive
-                            try:
-                                for future in as_completed(active_futures.keys(), timeout=0.1):
-                                    completed_futures.append(future)
-                                    # Process one completed job and continue immediately
-                                    break
-                            except TimeoutError:
-                                # No jobs completed yet, that's ok - continue to submit more if possible
-                                completed_futures = []
-                            
-                            # Handle completed futures
-                            for future in completed_futures:
-                                url_depth = active_futures.pop(future)
-                                future_start_times.pop(future, None)  # Clean up timing tracking
-                                try:
-                                    result = future.result(timeout=0.1)  # Very short timeout on result
-                                    if result:
-                                        # Update last processed URL
-                                        self.progress_tracker.update_stat('last_url', url_depth[0])
-                                except TimeoutError:
-                                    # Result not ready yet, put it back for next iteration
-                                    active_futures[future] = url_depth
-                                    future_start_times[future] = current_time  # Reset timing
-                                except Exception as exc:
-                                    self.progress_tracker.increment_stat('urls_failed')
-                                    self.progress_tracker.update_stat('last_error', str(exc))
-                                
-                                # Update active threads count
-                                self.progress_tracker.update_stat('active_threads', len(active_futures))
-                                # Update progress display
-                                live.update(self.progress_tracker.create_progress_panel())
+                # Process download queue with true parallelism on the crawler's long-lived pool
+                executor = self.executor
+                active_futures = {}
+                future_deadlines = {}  # Track when each future must be given up on
+                max_future_timeout = 60  # Maximum time to allow a future to run (seconds)
+                
+                while self.download_queue or active_futures:
+                    # Submit new jobs while we have capacity and pending URLs
+                    while len(active_futures) < self.max_workers and self.download_queue:
+                        url_depth = self.download_queue.popleft()
+                        future = executor.submit(self.download_url_parallel, url_depth)
+                        active_futures[future] = url_depth
+                        future_deadlines[future] = time.monotonic() + max_future_timeout
                         
-                        # Brief pause to prevent busy waiting, but keep system responsive
-                        if not self.download_queue and not active_futures:
-                            break
-                        elif not completed_futures and active_futures:
-                            # If we have active futures but none completed, short pause
-                            time.sleep(0.05)
+                        # Update progress tracker
+                        self.progress_tracker.update_stat('urls_queued', len(self.download_queue))
+                        self.progress_tracker.update_stat('active_threads', len(active_futures))
+                    
+                    # Block until a job completes or the oldest job reaches its deadline
+                    timeout = max(0, min(future_deadlines.values()) - time.monotonic())
+                    done, _ = wait(active_futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                    
+                    # Handle completed futures
+                    for future in done:
+                        url_depth = active_futures.pop(future)
+                        future_deadlines.pop(future, None)
+                        try:
+                            if future.result():
+                                # Update last processed URL
+                                self.progress_tracker.update_stat('last_url', url_depth[0])
+                        except Exception as exc:
+                            self.progress_tracker.update_stat('urls_failed')
+                            self.progress_tracker.update_stat('last_error', str(exc))
+                    
+                    # Give up on futures that are taking too long
+                    now = time.monotonic()
+                    expired = [future for future, deadline in future_deadlines.items() if deadline <= now]
+                    for future in expired:
+                        url_depth = active_futures.pop(future)
+                        future_deadlines.pop(future)
+                        future.cancel()  # Only prevents it from starting if still queued
+                        self.progress_tracker.update_stat('urls_failed')
+                        self.progress_tracker.update_stat('last_error', f'Timeout after {max_future_timeout}s: {url_depth[0]}')
+                        print(f"⏰ Cancelled timeout future: {url_depth[0]}")
+                    
+                    if done or expired:
+                        # Update active threads count
+                        self.progress_tracker.update_stat('active_threads', len(active_futures))
                 
                 # Final update
+                self.shutdown_markdown_pool()
+                self.flush_log()
                 self.progress_tracker.update_stat('urls_queued', 0)
-                live.update(self.progress_tracker.create_progress_panel())
+                live.refresh()
                 
             except KeyboardInterrupt:
+                self.shutdown_markdown_pool(wait=False)
+                self.flush_log()
                 self.progress_tracker.update_stat('last_error', 'Interrupted by user')
-                live.update(self.progress_tracker.create_progress_panel())
+                live.refresh()
                 print(f"\n🛑 Download interrupted by user")
                 raise
         
@@ -1141,15 +1608,56 @@ class WebCrawler:
         """
         return self.download_recursive(self.start_url)
 
+def read_yaml_config(config_path):
+    """
+    Parses a YAML configuration file, reusing a JSON copy of the result
+    (config_path + '.json') while the YAML file's size and mtime are unchanged
+    """
+    stat = os.stat(config_path)
+    source_key = [stat.st_mtime_ns, stat.st_size]
+    cache_path = config_path + '.json'
+    
+    # JSON, not pickle: loading the cache must never be able to run code
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('source') == source_key:
+            return cached['config']
+    except Exception:
+        pass  # Missing, stale format or unreadable cache: parse the YAML
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.load(f, Loader=_YAML_LOADER)
+    
+    # Only cache configs that survive a JSON round trip unchanged (no dates, non-string keys, ...)
+    try:
+        data = json.dumps({'source': source_key, 'config': config})
+        if json.loads(data)['config'] != config:
+            return config
+    except (TypeError, ValueError):
+        return config
+    
+    # Write the cache atomically; a read-only config directory just means no cache
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    return config
+
 def load_config():
     """Loads configuration from YAML file or returns default configuration"""
     config_path = 'config/config.yml'
     if os.path.exists(config_path):
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                print(f"✓ Configuration loaded from {config_path}")
-                return config
+            config = read_yaml_config(config_path)
+            print(f"✓ Configuration loaded from {config_path}")
+            return config
         except Exception as e:
             print(f"⚠️  Error loading YAML configuration: {e}")
             print("📄 Using default configuration")
@@ -1158,23 +1666,36 @@ def load_config():
     
     return None
 
+def count_files(directory):
+    """Counts regular files under a directory in a single scandir pass (0 if it doesn't exist)"""
+    file_count = 0
+    pending = [directory]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    else:
+                        file_count += 1
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return file_count
+
 def check_existing_content(config):
-    """Check if there's existing downloaded content and database progress"""
+    """Check if there's existing downloaded content and database progress.
+    Returns (has_files, has_database, file_count) so the count can be shown without rescanning."""
     output_dir = config.get('output', {}).get('output_dir', 'downloaded_content')
     db_path = config.get('files', {}).get('database_file', 'crawler_data.db')
     
-    has_files = False
     has_database = False
     
-    # Check if output directory exists and has content
-    if os.path.exists(output_dir):
-        # Count files in the directory (excluding directories)
-        file_count = sum(1 for root, dirs, files in os.walk(output_dir) for file in files)
-        if file_count > 0:
-            has_files = True
+    # Count files in the output directory (excluding directories)
+    file_count = count_files(output_dir)
+    has_files = file_count > 0
     
     # Check if database exists and has progress
-    if os.path.exists(db_path):
+    if os.path.isfile(db_path):
         try:
             from database_manager import DatabaseManager
             db = DatabaseManager(db_path)
@@ -1185,16 +1706,59 @@ def check_existing_content(config):
         except Exception as e:
             print(f"⚠️  Error checking database: {e}")
     
-    return has_files, has_database
+    return has_files, has_database, file_count
+
+def _prompt_with_timeout(prompt, timeout=None, default=None):
+    """
+    Reads one line from stdin, returning `default` if nothing is entered within `timeout` seconds
+    
+    Waits indefinitely when timeout is None or 0. Uses selectors on POSIX and
+    polls msvcrt on Windows, where select() doesn't work on console handles.
+    """
+    if not timeout:
+        return input(prompt)
+    
+    print(prompt, end='', flush=True)
+    if os.name == 'nt':
+        import msvcrt
+        deadline = time.monotonic() + timeout
+        chars = []
+        while time.monotonic() < deadline:
+            if msvcrt.kbhit():
+                char = msvcrt.getwche()
+                if char in ('\r', '\n'):
+                    print()
+                    return ''.join(chars)
+                if char == '\x03':
+                    raise KeyboardInterrupt
+                chars.append(char)
+                deadline = time.monotonic() + timeout  # Typing keeps the prompt open
+            else:
+                time.sleep(0.05)
+    else:
+        with selectors.DefaultSelector() as selector:
+            try:
+                selector.register(sys.stdin, selectors.EVENT_READ)
+                ready = selector.select(timeout)
+            except (OSError, ValueError):
+                ready = True  # Not pollable (e.g. a regular file): it never blocks anyway
+            if ready:
+                line = sys.stdin.readline()
+                if line:
+                    return line
+    
+    print(f"\n⏱️  No answer, using default: {default}")
+    return default
 
-def show_startup_menu(has_files, has_database, output_dir, db_path):
-    """Show interactive menu for handling existing content"""
+def show_startup_menu(has_files, has_database, output_dir, db_path, file_count=None, prompt_timeout=None):
+    """Show interactive menu for handling existing content (option 3 is chosen after prompt_timeout seconds)"""
     print("\n" + "="*60)
     print("🔍 EXISTING CONTENT DETECTED")
     print("="*60)
     
     if has_files:
-        file_count = sum(1 for root, dirs, files in os.walk(output_dir) for file in files)
+        if file_count is None:
+            file_count = count_files(output_dir)
         print(f"📁 Downloaded files found: {file_count} files in {output_dir}")
     
     if has_database:
@@ -1215,7 +1779,7 @@ def show_startup_menu(has_files, has_database, output_dir, db_path):
     
     while True:
         try:
-            choice = input("\nEnter your choice (1-4): ").strip()
+            choice = _prompt_with_timeout("\nEnter your choice (1-4): ", prompt_timeout, default='3').strip()
             if choice in ['1', '2', '3', '4']:
                 return choice
             else:
@@ -1273,6 +1837,131 @@ def handle_existing_content_choice(choice, output_dir, db_path):
     
     return False
 
+# Menu choice applied for each startup.on_existing policy when running unattended
+EXISTING_CONTENT_POLICIES = {'overwrite': '1', 'reset': '2', 'append': '3'}
+
+def is_interactive(config):
+    """True when the startup menu may prompt on stdin"""
+    if config.get('startup', {}).get('non_interactive', False):
+        return False
+    return sys.stdin is not None and sys.stdin.isatty()
+
+def probe_optimal_workers(start_url, cookies=None, headers=None, levels=(2, 4, 8, 16, 32),
+                          duration=3.0, timeout=10):
+    """
+    Measures throughput against start_url with increasing concurrency
+    
+    Each level hammers the URL for `duration` seconds. Escalation stops once the
+    error rate reaches 1%. Returns the largest level whose throughput is within 5%
+    of the best one observed, or None if no level ran cleanly.
+    """
+    results = []  # (workers, requests per second)
+    limit = max_worker_limit()
+    
+    for workers in levels:
+        if workers > limit:
+            break
+        
+        session = requests.Session()
+        adapter = PreloadedTLSAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.cookies.update(cookies or {})
+        session.headers.update(headers or {})
+        
+        counts_lock = threading.Lock()
+        counts = {'ok': 0, 'errors': 0}
+        deadline = time.monotonic() + duration
+        
+        def hammer():
+            while time.monotonic() < deadline:
+                try:
+                    with session.get(start_url, timeout=timeout) as response:
+                        ok = response.status_code < 400
+                except requests.RequestException:
+                    ok = False
+                with counts_lock:
+                    counts['ok' if ok else 'errors'] += 1
+        
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for _ in range(workers):
+                executor.submit(hammer)
+        elapsed = time.monotonic() - started
+        session.close()
+        
+        total = counts['ok'] + counts['errors']
+        error_rate = counts['errors'] / total if total else 1.0
+        throughput = counts['ok'] / elapsed if elapsed > 0 else 0.0
+        print(f"   🧪 {workers:>2} workers: {throughput:.1f} req/s, {error_rate:.1%} errors")
+        
+        if error_rate >= 0.01:
+            break
+        results.append((workers, throughput))
+    
+    if not results:
+        return None
+    peak = max(throughput for _, throughput in results)
+    return max(workers for workers, throughput in results if throughput >= peak * 0.95)
+
+def max_worker_limit():
+    """Upper bound for concurrent workers: 8 per CPU core, never more than 50"""
+    return min(50, (os.cpu_count() or 4) * 8)
+
+def preflight(session, start_url, timeout=5):
+    """
+    Resolves the start host and opens one pooled connection before crawling
+    
+    Primes the resolver cache and leaves a keep-alive connection in the session's
+    pool, so the first real request skips DNS and the TCP/TLS handshake. Failures
+    are only reported: the crawl itself will surface real connectivity problems.
+    """
+    parsed = urlparse(start_url)
+    if not parsed.hostname:
+        return False
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        socket.getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+        session.head(start_url, allow_redirects=True, timeout=timeout).close()
+        return True
+    except (OSError, ValueError, requests.RequestException) as e:
+        print(f"⚠️  Preflight to {parsed.hostname} failed: {e}")
+        return False
+
+# Exit codes so wrappers (cron, CI) can tell failures apart without parsing output
+EXIT_BAD_ARGS = 2
+EXIT_MISSING_CONFIG = 3
+EXIT_MISSING_COOKIES = 4
+EXIT_EXISTING_CONTENT = 5
+
+def fail(message, exit_code, hint=None):
+    """Print an error (and optional hint) to stderr and exit with the given code"""
+    print(message, file=sys.stderr)
+    if hint:
+        print(hint, file=sys.stderr)
+    sys.stderr.flush()
+    raise SystemExit(exit_code)
+
+# Command line interface, built once at import (positional for backward compatibility)
+_PARSER = argparse.ArgumentParser(
+    description="Download a website or Confluence space as Markdown or HTML",
+    epilog="Without arguments, everything is read from config/config.yml.\n\n"
+           "Examples:\n"
+           "  python3 web_crawler.py 'https://example.com/docs'\n"
+           "  python3 web_crawler.py 'https://example.com/wiki' 3 SPACE markdown 8",
+    formatter_class=argparse.RawDescriptionHelpFormatter)
+_PARSER.add_argument('start_url', nargs='?',
+                     help='URL to start crawling from (overrides website.start_url)')
+_PARSER.add_argument('depth', nargs='?', type=int, default=1,
+                     help='Maximum link depth (default: 1)')
+_PARSER.add_argument('space', nargs='?', default='DEFAULT',
+                     help='Space name used for the output folder (default: DEFAULT)')
+_PARSER.add_argument('format', nargs='?', default=OutputFormat.MARKDOWN.value, type=str.lower,
+                     choices=[fmt.value for fmt in OutputFormat],
+                     help='Output format (default: markdown)')
+_PARSER.add_argument('threads', nargs='?', type=int, default=5,
+                     help=f'Concurrent threads, 1-{max_worker_limit()} (default: 5)')
+
 def main():
     """
     Main entry point for the web crawler
@@ -1288,94 +1977,142 @@ def main():
     
     The orchestrator will automatically select the best crawler for your site.
     """
+    # Usage errors exit with argparse's status 2, the same as EXIT_BAD_ARGS
+    args = _PARSER.parse_args()
+    
     # Load YAML configuration first
     config = load_config()
     
     # If there are command line arguments, use them to override configuration
-    if len(sys.argv) >= 2 and sys.argv[1] not in ['-h', '--help']:
+    if args.start_url:
         # Command line mode (backward compatibility)
-        if len(sys.argv) < 2:
-            print("Usage: python3 web_crawler.py <START_URL> [DEPTH] [SPACE] [FORMAT] [THREADS]")
-            print("Or use config/config.yml file for advanced configuration")
-            print("\nExamples:")
-            print("  python3 web_crawler.py 'https://example.com/docs'")
-            print("  python3 web_crawler.py 'https://example.com/wiki' 3 SPACE markdown 8")
-            print("Available formats: markdown (default), html")
-            print("Concurrent threads: 1-50 (default: 5)")
-            sys.exit(1)
-        
-        start_url = sys.argv[1]
-        depth = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-        space = sys.argv[3] if len(sys.argv) > 3 else 'DEFAULT'
-        output_format = sys.argv[4] if len(sys.argv) > 4 else 'markdown'
-        max_workers = int(sys.argv[5]) if len(sys.argv) > 5 else 5
-        
-        # Validate format
-        if output_format not in ['markdown', 'html']:
-            print(f"❌ Invalid format: {output_format}. Use 'markdown' or 'html'")
-            sys.exit(1)
+        start_url = args.start_url
+        depth = args.depth
+        space = args.space
+        output_format = OutputFormat.parse(args.format)
+        max_workers = args.threads
         
         # Validate number of threads
-        if max_workers < 1 or max_workers > 50:
-            print(f"❌ Invalid number of threads: {max_workers}. Use between 1 and 50")
-            sys.exit(1)
+        worker_limit = max_worker_limit()
+        if max_workers < 1 or max_workers > worker_limit:
+            fail(f"❌ Invalid number of threads: {max_workers}. Use between 1 and {worker_limit}", EXIT_BAD_ARGS)
         
         # Create configuration from command line arguments
         if config is None:
             config = {}
         
         # Override configuration with command line arguments
-        config.setdefault('website', {})['start_url'] = start_url
-        config.setdefault('crawling', {})['max_depth'] = depth
-        config.setdefault('crawling', {})['space_name'] = space
-        config.setdefault('crawling', {})['max_workers'] = max_workers
-        config.setdefault('output', {})['format'] = output_format
-        
-        print(f"📄 Output format: {output_format.upper()}")
+        overrides = {
+            'website': {'start_url': start_url},
+            'crawling': {'max_depth': depth, 'space_name': space,
+                         'max_workers': max_workers},
+            'output': {'format': output_format.value},
+        }
+        for section, values in overrides.items():
+            config.setdefault(section, {}).update(values)
         
     elif config is None:
-        print("❌ Error: YAML configuration or command line arguments required")
-        print("📄 Create a config/config.yml file or provide arguments")
-        sys.exit(1)
+        fail("❌ Error: YAML configuration or command line arguments required", EXIT_MISSING_CONFIG,
+             "📄 Create a config/config.yml file or provide arguments")
     else:
         # Pure YAML configuration mode
         start_url = config.get('website', {}).get('start_url')
         if not start_url:
-            print("❌ Error: start_url not defined in configuration")
-            sys.exit(1)
-        print(f"📄 Output format: {config.get('output', {}).get('format', 'markdown').upper()}")
+            fail("❌ Error: start_url not defined in configuration", EXIT_MISSING_CONFIG)
     
-    # Check cookies file
-    cookies_file = config.get('files', {}).get('cookies_file', 'config/cookies.txt')
-    if not os.path.exists(cookies_file):
-        print(f"❌ Error: {cookies_file} file not found")
-        print(f"📄 Copy config/cookies.template.txt to {cookies_file} and configure your cookies")
-        sys.exit(1)
+    # Resolve the configuration sections used below once
+    crawling = config.setdefault('crawling', {})
+    output = config.get('output', {})
+    files = config.get('files', {})
+    startup = config.get('startup', {})
     
-    # Check for existing content and handle user choice
-    has_files, has_database = check_existing_content(config)
-    if has_files or has_database:
-        output_dir = config.get('output', {}).get('output_dir', 'downloaded_content')
-        db_path = config.get('files', {}).get('database_file', 'crawler_data.db')
-        choice = show_startup_menu(has_files, has_database, output_dir, db_path)
-        handle_existing_content_choice(choice, output_dir, db_path)
+    # Machine-driven runs can turn off the informational banners
+    quiet = config.get('logging', {}).get('quiet', False)
+    try:
+        output_format = OutputFormat.parse(output.get('format', 'markdown'))
+    except ValueError:
+        fail(f"❌ Invalid output.format: {output.get('format')}. Use 'markdown' or 'html'", EXIT_MISSING_CONFIG)
+    if not quiet:
+        print(f"📄 Output format: {output_format.label}")
+    
+    # Check the cookies file and parse it once for every consumer
+    cookies_file = files.get('cookies_file', 'config/cookies.txt')
+    if not os.access(cookies_file, os.R_OK):
+        fail(f"❌ Error: {cookies_file} file not found or not readable", EXIT_MISSING_COOKIES,
+             f"📄 Copy config/cookies.template.txt to {cookies_file} and configure your cookies")
+    try:
+        cookies = parse_cookies_file(cookies_file)
+    except (OSError, UnicodeDecodeError) as e:
+        fail(f"❌ Error reading {cookies_file}: {e}", EXIT_MISSING_COOKIES)
+    
+    # Optionally pick max_workers from a short load probe against the start URL
+    if crawling.get('auto_workers', False):
+        print("🧪 Probing server to choose the number of workers...")
+        user_agent = config.get('advanced', {}).get('user_agent')
+        optimal_workers = probe_optimal_workers(start_url, cookies, {'User-Agent': user_agent} if user_agent else None)
+        if optimal_workers:
+            crawling['max_workers'] = optimal_workers
+            print(f"✓ Using {optimal_workers} workers")
+        else:
+            print("⚠️ Probe failed, keeping configured max_workers")
+    
+    # Check for existing content: ask on a terminal, apply the configured policy otherwise
+    output_dir = output.get('output_dir', 'downloaded_content')
+    db_path = files.get('database_file', 'crawler_data.db')
+    if is_interactive(config):
+        has_files, has_database, file_count = check_existing_content(config)
+        if has_files or has_database:
+            prompt_timeout = startup.get('prompt_timeout', 10)
+            choice = show_startup_menu(has_files, has_database, output_dir, db_path, file_count, prompt_timeout)
+            handle_existing_content_choice(choice, output_dir, db_path)
+    else:
+        policy = startup.get('on_existing', 'append')
+        if policy == 'fail':
+            has_files, has_database, _ = check_existing_content(config)
+            if has_files or has_database:
+                fail(f"❌ Error: existing content found in {output_dir} or {db_path}", EXIT_EXISTING_CONTENT,
+                     "📄 Remove it or set startup.on_existing to 'append', 'reset' or 'overwrite'")
+        elif policy in EXISTING_CONTENT_POLICIES:
+            # No scan needed: resuming changes nothing and the other choices are no-ops without content
+            if policy != 'append':
+                handle_existing_content_choice(EXISTING_CONTENT_POLICIES[policy], output_dir, db_path)
+        else:
+            fail(f"❌ Invalid startup.on_existing: {policy}. Use 'append', 'reset', 'overwrite' or 'fail'",
+                 EXIT_MISSING_CONFIG)
     
     # Create crawler with configuration
     # Use orchestrator if available (Confluence API support), otherwise use WebCrawler directly
+    crawler_orchestrator = None
     if ORCHESTRATOR_AVAILABLE:
-        print("🔍 Using intelligent crawler selection (Confluence API + HTML modes available)")
-        orchestrator = CrawlerOrchestrator(config)
+        try:
+            crawler_orchestrator = _load_orchestrator()
+        except ImportError as e:
+            print(f"⚠️  Crawler orchestrator unavailable ({e}), falling back to HTML mode")
+    
+    # Build the HTTP session once (cookies, headers, connection pool) and share it
+    session = build_session(config, cookies)
+    rate_limiter = PerHostLimiter(crawling.get('request_delay'))
+    if crawling.get('preflight', True):
+        preflight(session, start_url)
+    
+    if crawler_orchestrator is not None:
+        if not quiet:
+            print("🔍 Using intelligent crawler selection (Confluence API + HTML modes available)")
+        orchestrator = crawler_orchestrator(config, session=session, rate_limiter=rate_limiter)
         orchestrator.run()
     else:
-        print("🔍 Using HTML crawler mode")
-        crawler = WebCrawler(config)
-        pages_downloaded = crawler.download_recursive(start_url)
-        
-        max_workers = config.get('crawling', {}).get('max_workers', 5)
-        output_format = config.get('output', {}).get('format', 'markdown')
+        if not quiet:
+            print("🔍 Using HTML crawler mode")
+        crawler = WebCrawler(config, session=session, rate_limiter=rate_limiter)
+        try:
+            pages_downloaded = crawler.download_recursive(start_url)
+        finally:
+            crawler.close()
+        max_workers = crawling.get('max_workers', 5)
         
-        print(f"\n✅ Process completed: {pages_downloaded} pages downloaded in {output_format.upper()} format")
-        print(f"🧵 Threads used: {max_workers}")
+        if not quiet:
+            print(f"\n✅ Process completed: {pages_downloaded} pages downloaded in {output_format.label} format")
+            print(f"🧵 Threads used: {max_workers}")
 
 if __name__ == "__main__":
     main()